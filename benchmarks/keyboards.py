@@ -0,0 +1,90 @@
+"""
+Бенчмарк отрисовки клавиатуры ароматов на тап (toggle_sku).
+
+"before" — прежний get_sku_keyboard: все кнопки и разметка заново на каждый тап.
+"after" — bot.keyboards.sku.get_sku_keyboard: скелет линейки на версию
+каталога, на тап только галочки по маске выбора, частые наборы из LRU.
+
+Запуск: python -m benchmarks.keyboards [кол-во тапов] [ароматов в линейке]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.keyboards import sku
+from bot.services import catalog as catalog_module
+
+
+def _old_get_sku_keyboard(catalog, line_index: str, selected: set[str]) -> InlineKeyboardMarkup:
+    line = catalog.get_line(line_index)
+    skus = line.skus if line else ()
+    buttons = []
+    for sku_name in skus:
+        key = sku_name[:20]
+        text = f"✅ {sku_name}" if key in selected else sku_name
+        buttons.append([InlineKeyboardButton(text=text, callback_data=f"sku_{key}")])
+    buttons.append([InlineKeyboardButton(text="✅ Готово с этой линейкой", callback_data="sku_done")])
+    buttons.append([InlineKeyboardButton(text="⬅ Назад к линейкам", callback_data="sku_back")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def synthetic_catalog(lines: int, per_line: int):
+    header = [f"Line {i}" for i in range(lines)]
+    rows = [header] + [
+        [f"Аромат {c}-{r} {random.choice(['mint', 'berry', 'citrus'])}" for c in range(lines)]
+        for r in range(per_line)
+    ]
+    return catalog_module.parse_catalog(rows, 1)
+
+
+def synthetic_taps(catalog, taps: int):
+    """
+    Сессии по одной линейке: амбассадор отмечает и снимает несколько ароматов.
+    Выбор на каждом тапе — набор названий (прежний формат) и маска (черновик).
+    """
+    result = []
+    while len(result) < taps:
+        line = random.choice(catalog.lines)
+        positions = random.sample(range(len(line.skus)), min(5, len(line.skus)))
+        selected: set[str] = set()
+        mask = 0
+        for position in positions + positions[:2]:
+            selected ^= {line.skus[position][:20]}
+            mask ^= 1 << position
+            result.append((line.id, set(selected), mask))
+    return result[:taps]
+
+
+def main():
+    taps_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    per_line = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    random.seed(1)
+    catalog = synthetic_catalog(4, per_line)
+    taps = synthetic_taps(catalog, taps_count)
+    catalog_module._cache.prime(catalog)
+
+    started = time.perf_counter()
+    for line_id, selected, _ in taps:
+        _old_get_sku_keyboard(catalog, line_id, selected)
+    before = time.perf_counter() - started
+
+    async def run_after():
+        for line_id, _, mask in taps:
+            await sku.get_sku_keyboard(line_id, mask)
+
+    started = time.perf_counter()
+    asyncio.run(run_after())
+    after = time.perf_counter() - started
+
+    print(f"taps: {len(taps)}, ароматов в линейке: {per_line}")
+    print(f"before: {before / len(taps) * 1e6:.1f} мкс/тап")
+    print(f"after:  {after / len(taps) * 1e6:.1f} мкс/тап")
+    print(f"LRU: {sku._render.cache_info()}")
+    print(f"speedup: x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
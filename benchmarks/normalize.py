@@ -0,0 +1,81 @@
+"""
+Бенчмарк нормализации заведений на синтетической выгрузке формы.
+
+"before" — прежние _normalize_text/_normalize_address: regex и цепочка
+str.replace на каждую строку.
+"after" — bot.services.normalize.normalize_venue_keys: пачкой по колонке,
+скомпилированный однопроходный regex и LRU для повторяющихся адресов.
+
+Запуск: python -m benchmarks.normalize [кол-во строк]
+"""
+import random
+import re
+import sys
+import time
+
+from bot.services import normalize
+
+STREETS = ["Ленина", "Пушкина", "Тверская", "Арбат", "Мира", "Садовая", "Гагарина"]
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Екатеринбург", "Новосибирск"]
+NAMES = ["Кофейня", "Бар", "Лаунж", "Ресторан", "Кальянная", "Cafe", "Ёлка"]
+
+
+def _old_normalize_text(value: str) -> str:
+    if not value:
+        return ""
+    value = value.strip().lower()
+    value = value.replace("ё", "е")
+    value = re.sub(r"\s+", " ", value)
+    return value
+
+
+def _old_normalize_address(address: str) -> str:
+    if not address:
+        return ""
+    address = _old_normalize_text(address)
+    for junk in ["россия,", "рф,", "г.", "город", "россия", "рф"]:
+        address = address.replace(junk, "")
+    address = re.sub(r"\s+", " ", address)
+    return address.strip()
+
+
+def _old_venue_key(name: str, address: str) -> str:
+    base = _old_normalize_text(name)
+    norm_addr = _old_normalize_address(address) if address else ""
+    return f"{base} ({norm_addr})" if norm_addr else base
+
+
+def _make_rows(count: int, seed: int = 1) -> tuple[list[str], list[str]]:
+    rnd = random.Random(seed)
+    names, addresses = [], []
+    for _ in range(count):
+        names.append(f"  {rnd.choice(NAMES)}  №{rnd.randint(1, 300)} ")
+        # как в живой форме: одни и те же заведения отмечают много раз
+        addresses.append(
+            f"Россия, г. {rnd.choice(CITIES)},  ул. {rnd.choice(STREETS)}, д. {rnd.randint(1, 400)}"
+        )
+    return names, addresses
+
+
+def main(count: int = 100_000):
+    names, addresses = _make_rows(count)
+
+    start = time.perf_counter()
+    before = [_old_venue_key(n, a) for n, a in zip(names, addresses)]
+    before_time = time.perf_counter() - start
+
+    normalize.normalize_address.cache_clear()
+    normalize._venue_key.cache_clear()
+    start = time.perf_counter()
+    after = normalize.normalize_venue_keys(names, addresses)
+    after_time = time.perf_counter() - start
+
+    print(f"rows: {count}")
+    print(f"before: {before_time:.3f} s ({count / before_time:,.0f} rows/s)")
+    print(f"after:  {after_time:.3f} s ({count / after_time:,.0f} rows/s)")
+    print(f"speedup: x{before_time / after_time:.1f}")
+    print(f"sample: {before[0]!r} -> {after[0]!r}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,73 @@
+"""
+Микробенчмарк: стоимость подготовки клиента Sheets на один вызов.
+
+"before" — как раньше: на каждый вызов читаем JSON сервисного аккаунта,
+создаём Credentials и собираем discovery-клиент.
+"after" — общий клиент процесса (`get_service()`), подготовка один раз.
+
+Сеть не используется: ключ сервисного аккаунта генерируется локально,
+discovery-документ берётся из пакета googleapiclient.
+
+Запуск: python -m benchmarks.sheets_client [кол-во вызовов]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import rsa
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build
+
+from bot.services import sheets
+
+
+def _write_fake_service_file(path: str):
+    _, private_key = rsa.newkeys(1024)
+    info = {
+        "type": "service_account",
+        "project_id": "bench",
+        "private_key_id": "bench",
+        "private_key": private_key.save_pkcs1().decode(),
+        "client_email": "bench@bench.iam.gserviceaccount.com",
+        "client_id": "1",
+        "token_uri": "https://oauth2.googleapis.com/token",
+    }
+    with open(path, "w") as f:
+        json.dump(info, f)
+
+
+def _old_get_service(service_file: str):
+    creds = Credentials.from_service_account_file(service_file, scopes=sheets.SCOPES)
+    service = build("sheets", "v4", credentials=creds, static_discovery=True)
+    return service.spreadsheets()
+
+
+def _measure(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def main(calls: int = 50):
+    with tempfile.TemporaryDirectory() as tmp:
+        service_file = os.path.join(tmp, "service_account.json")
+        _write_fake_service_file(service_file)
+
+        before = _measure(lambda: _old_get_service(service_file), calls)
+
+        # общий клиент без фонового обновления токена (нет сети)
+        sheets._client = sheets._SheetsClient(service_file)
+        after = _measure(sheets.get_service, calls)
+        sheets._client = None
+
+    print(f"calls: {calls}")
+    print(f"before (per call): {before * 1000:.3f} ms")
+    print(f"after  (per call): {after * 1000:.6f} ms")
+    print(f"speedup: x{before / after:.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
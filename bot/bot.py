@@ -1,24 +1,99 @@
 import asyncio
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from bot.config import BOT_TOKEN
+from bot.config import (
+    BOT_MODE,
+    BOT_TOKEN,
+    CATALOG_TTL,
+    EMPLOYEES_TTL,
+    FSM_DB_FILE,
+    FSM_HOT_SIZE,
+    FSM_TTL,
+    REQUESTS_STATUS_SYNC_INTERVAL,
+    REQUESTS_SYNC_INTERVAL,
+    RUN_SHEET_SYNC_JOBS,
+    VENUES_SYNC_INTERVAL,
+    VENUES_TTL,
+)
 from bot.handlers.create_request import router as create_request_router
 from bot.handlers.filters import router as filters_router
 from bot.handlers.chat_link import router as chat_link_router
+from bot.handlers.admin import router as admin_router
+from bot.handlers.distributor import router as distributor_router
+from bot.services import background, notifier, sheets, sheets_async, submissions
+from bot.services.catalog import refresh_catalog
+from bot.services.employees import refresh_employees
+from bot.services.fsm_storage import SQLiteStorage
+from bot.services.requests_db import get_mirror, pull_new_requests, refresh_request_statuses
+from bot.middlewares.identity import IdentityMiddleware
+from bot.services.venues import refresh_venues, sync_new_venues
 
-async def main():
-    bot = Bot(token=BOT_TOKEN, parse_mode=ParseMode.HTML)
-    dp = Dispatcher(storage=MemoryStorage())
 
-    # Регистрируем роутеры
+async def on_startup(dispatcher: Dispatcher, bot: Bot):
+    # зеркало заявок подписывается на записи до того, как поднимется очередь записи
+    get_mirror()
+    # поднимаем очередь записи: журнал с прошлого запуска уйдёт в таблицу
+    await sheets_async.run(sheets.get_write_queue)
+    # недоделанные заявки прошлого запуска: дослать уведомления и строки
+    submissions.get_pipeline().start(bot)
+    # на свежем развёртывании зеркало пустое: без первой догрузки отчёты
+    # до первого периодического запуска показывали бы пустоту
+    try:
+        await pull_new_requests()
+    except Exception as e:
+        print(f"[startup:requests_pull] ERROR: {e}")
+    # держим кэши тёплыми, чтобы пользователи не ждали загрузки листов
+    background.start_periodic("catalog", CATALOG_TTL, refresh_catalog)
+    background.start_periodic("venues", VENUES_TTL, refresh_venues)
+    background.start_periodic("employees", EMPLOYEES_TTL, refresh_employees)
+    # новые ответы формы → лист «Заведения» (раньше — только ручным запуском скрипта);
+    # пишет в общий лист, поэтому только в одном процессе
+    if RUN_SHEET_SYNC_JOBS:
+        background.start_periodic("venues_sync", VENUES_SYNC_INTERVAL, sync_new_venues)
+    background.start_periodic("requests_pull", REQUESTS_SYNC_INTERVAL, pull_new_requests)
+    background.start_periodic(
+        "requests_statuses", REQUESTS_STATUS_SYNC_INTERVAL, refresh_request_statuses
+    )
+    # брошенные черновики заявок
+    background.start_periodic("fsm_purge", 3600, dispatcher.storage.purge_expired)
+
+
+async def on_shutdown():
+    await background.stop_all()
+    await submissions.get_pipeline().stop()
+    # уведомления дистрибьюторам, уже поставленные в очередь, дослать до закрытия сессии
+    await notifier.drain()
+    await sheets_async.run(sheets.flush_writes)
+
+
+def create_dispatcher() -> Dispatcher:
+    dp = Dispatcher(storage=SQLiteStorage(FSM_DB_FILE, FSM_TTL, FSM_HOT_SIZE))
+    dp.update.outer_middleware(IdentityMiddleware())
+
+    # Регистрируем роутеры (служебные команды — первыми, до FSM-хэндлеров)
+    dp.include_router(admin_router)
+    dp.include_router(distributor_router)
     dp.include_router(create_request_router)
     dp.include_router(filters_router)
     dp.include_router(chat_link_router)
 
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    return dp
+
+
+async def main():
+    bot = Bot(token=BOT_TOKEN, parse_mode=ParseMode.HTML)
+    dp = create_dispatcher()
+
     print("Бот запущен...")
     await dp.start_polling(bot)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if BOT_MODE == "webhook":
+        from bot.webhook import run_webhook
+
+        run_webhook(create_dispatcher(), Bot(token=BOT_TOKEN, parse_mode=ParseMode.HTML))
+    else:
+        asyncio.run(main())
@@ -8,3 +8,92 @@ GOOGLE_SERVICE_FILE = "service_account.json"
 SPREADSHEET_ID = "10cPTpYQ51fzb8xy_SyTe2szP-shbwpsDgpyUbdXyxSA"
 SOURCE_SPREADSHEET_ID = "1EDrR3HPmsEY8gAzJoicFZJ02CbpPoHBBmga_XokkG00"
 TARGET_SPREADSHEET_ID = "10cPTpYQ51fzb8xy_SyTe2szP-shbwpsDgpyUbdXyxSA"
+
+# За сколько секунд до истечения OAuth-токена обновлять его в фоне
+GOOGLE_TOKEN_REFRESH_MARGIN = 300
+
+# Сколько запросов к Google Sheets может выполняться одновременно
+SHEETS_MAX_CONCURRENCY = 8
+
+# Квоты Google Sheets API (запросов в минуту на чтение и на запись) и
+# повторы при 429/5xx: число попыток, базовая и максимальная пауза (секунды)
+SHEETS_READ_QUOTA = 60
+SHEETS_WRITE_QUOTA = 60
+SHEETS_MAX_RETRIES = 5
+SHEETS_BACKOFF_BASE = 1.0
+SHEETS_BACKOFF_MAX = 32.0
+
+# Время жизни кэша каталога SKU (секунды); с тем же интервалом он обновляется в фоне
+CATALOG_TTL = 300
+
+# Кто может пользоваться служебными командами (/reload), в формате @username
+ADMIN_USERNAMES = set()
+
+# Время жизни индекса заведений (секунды); с тем же интервалом он обновляется в фоне
+VENUES_TTL = 600
+
+# Время жизни кэша списка сотрудников (секунды); с тем же интервалом он обновляется в фоне
+EMPLOYEES_TTL = 300
+
+# Как часто перечитывать лист «Чаты» целиком (секунды); свои привязки бот пишет в кэш сразу
+CHAT_LINKS_TTL = 600
+
+# Очередь отложенной записи в таблицу: журнал неотправленного и интервал сброса пачки (секунды)
+WRITE_QUEUE_JOURNAL = "write_queue.jsonl"
+WRITE_QUEUE_FLUSH_INTERVAL = 2.0
+# Операция, которая не проходит WRITE_QUEUE_MAX_ATTEMPTS сбросов подряд из-за
+# постоянной ошибки (не 429/5xx/сеть) или не находит строку заявки, уходит
+# в отдельный файл и не держит очередь
+WRITE_QUEUE_DEAD_LETTER = "write_queue.dead.jsonl"
+WRITE_QUEUE_MAX_ATTEMPTS = 5
+
+# Сколько строк читать за один запрос при постраничном чтении больших листов
+SHEET_PAGE_SIZE = 1000
+
+# Индекс строк заявок перечитывается по листу при промахе не чаще раза в столько секунд
+ROW_INDEX_REBUILD_INTERVAL = 60
+
+# Инкрементальная синхронизация заведений из формы: файл с отметкой и интервал (секунды)
+VENUES_SYNC_STATE = "venues_sync.json"
+VENUES_SYNC_INTERVAL = 300
+
+# Хранилище FSM (черновики заявок): файл SQLite, через сколько секунд простоя
+# черновик удаляется и сколько сессий держать в памяти
+FSM_DB_FILE = "fsm.sqlite3"
+FSM_TTL = 3 * 24 * 3600
+FSM_HOT_SIZE = 1000
+
+# Локальное зеркало листа «Заявки» для отчётов: файл SQLite и интервал догрузки новых строк (секунды)
+REQUESTS_DB_FILE = "requests.sqlite3"
+REQUESTS_SYNC_INTERVAL = 120
+# Как часто перечитывать статусы уже загруженных заявок (их меняют и в самой таблице)
+REQUESTS_STATUS_SYNC_INTERVAL = 600
+
+# Журнал конвейера заявок: принятые, но ещё не разосланные/не записанные заявки
+SUBMISSIONS_JOURNAL = "submissions.jsonl"
+
+# Лимиты исходящих сообщений Telegram: всего в секунду, в один личный чат
+# в секунду, в одну группу в минуту; попыток доставки при сетевых ошибках
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_PRIVATE_RATE = 1
+TELEGRAM_GROUP_RATE = 20
+NOTIFY_MAX_ATTEMPTS = 5
+
+# Режим получения апдейтов: "polling" (long polling) или "webhook" (aiohttp-сервер).
+# В обоих режимах бот рассчитан на один экземпляр (см. bot/webhook.py)
+BOT_MODE = "polling"
+
+# Фоновые задачи, которые пишут в общую таблицу (синхронизация заведений из формы).
+# Если на одну таблицу запущено несколько процессов бота, включать только в одном
+RUN_SHEET_SYNC_JOBS = True
+
+# Настройки webhook-режима. Если WEBHOOK_BASE_URL пустой, вебхук в Telegram
+# не регистрируется — удобно для локальной проверки записанными апдейтами.
+WEBHOOK_BASE_URL = ""
+WEBHOOK_PATH = "/telegram/webhook"
+WEBHOOK_SECRET = ""
+WEBAPP_HOST = "0.0.0.0"
+WEBAPP_PORT = 8080
+# очередь апдейтов между приёмом и обработкой и число обработчиков
+WEBHOOK_QUEUE_SIZE = 1000
+WEBHOOK_WORKERS = 8
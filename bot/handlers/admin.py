@@ -0,0 +1,70 @@
+from aiogram import Router, types
+from aiogram.filters import Command
+
+from bot.config import ADMIN_USERNAMES
+from bot.services.catalog import invalidate_catalog
+from bot.services import notifier, sheets, submissions
+from bot.services.employees import invalidate_employees
+from bot.services.venues import invalidate_venues, sync_venues_from_source
+from bot.utils import normalize_username
+
+router = Router()
+
+
+def is_admin(message: types.Message) -> bool:
+    username = normalize_username(message.from_user.username if message.from_user else None)
+    return bool(username) and username in {normalize_username(a) for a in ADMIN_USERNAMES}
+
+
+# /reload — сбросить кэши, чтобы бот перечитал таблицу
+@router.message(Command("reload"))
+async def reload_caches(message: types.Message):
+    if not is_admin(message):
+        return
+
+    invalidate_catalog()
+    invalidate_venues()
+    invalidate_employees()
+    await message.answer("Кэш сброшен, данные будут перечитаны из таблицы.")
+
+
+# /stats — очередь записи, планировщик запросов, уведомления и конвейер заявок
+@router.message(Command("stats"))
+async def stats(message: types.Message):
+    if not is_admin(message):
+        return
+
+    q = sheets.write_queue_stats()
+    n = notifier.notifier_stats()
+    sub = submissions.submissions_stats()
+    last = q["last_flush_latency"]
+    await message.answer(
+        "Очередь записи:\n"
+        f"в очереди: {q['depth']}\n"
+        f"пачек отправлено: {q['flushes']}, с ошибкой: {q['failed_flushes']}\n"
+        f"последний сброс: {f'{last:.2f} с' if last is not None else '—'}\n"
+        f"максимум: {q['max_flush_latency']:.2f} с\n"
+        f"отложено в dead letter: {q['dead_letters']}\n\n"
+        + "\n".join(
+            f"Sheets, {kind}: запросов {s['requests']}, повторов {s['retries']}, "
+            f"ошибок {s['failed']}, ожидание квоты {s['quota_wait']:.1f} с "
+            f"(макс. {s['max_quota_wait']:.1f} с), паузы повторов {s['backoff_wait']:.1f} с"
+            for kind, s in sheets.scheduler_stats().items()
+        )
+        + "\n\nУведомления в чаты:\n"
+        f"в очереди: {n['depth']}, отправлено: {n['sent']}, "
+        f"с ошибкой: {n['failed']}, RetryAfter: {n['retry_after']}"
+        "\n\nКонвейер заявок:\n"
+        f"в работе: {sub['pending']}, завершено: {sub['completed']}, "
+        f"без уведомления: {sub['notify_failed']}"
+    )
+
+
+# /sync_venues — пересобрать лист «Заведения» из живой таблицы
+@router.message(Command("sync_venues"))
+async def sync_venues(message: types.Message):
+    if not is_admin(message):
+        return
+
+    count = await sync_venues_from_source()
+    await message.answer(f"Заведения синхронизированы, строк: {count}")
@@ -1,13 +1,17 @@
 from aiogram import Router
 from aiogram.types import ChatMemberUpdated
 
-from bot.services.sheets import write_chat_link
+from bot.services.sheets_async import write_chat_link
 
 router = Router()
 
 
 @router.my_chat_member()
-async def on_bot_added(event: ChatMemberUpdated):
+async def on_bot_added(
+    event: ChatMemberUpdated,
+    ambassador: str | None,
+    is_employee: bool | None,
+):
     """
     Автоматическая привязка чата дистрибьютора.
     Срабатывает, когда бота добавляют в группу.
@@ -20,20 +24,28 @@ async def on_bot_added(event: ChatMemberUpdated):
         chat_id = event.chat.id
 
         # Кто добавил бота — это амбассадор
-        username = event.from_user.username
-        if not username:
+        if not ambassador:
             return
 
-        ambassador = f"@{username}"
+        # список сотрудников не прочитался — просим привязать вручную позже
+        if is_employee is None:
+            try:
+                await event.bot.send_message(
+                    chat_id,
+                    "Не удалось проверить права: таблица недоступна.\n"
+                    "Привяжи чат командой /bind чуть позже."
+                )
+            except:
+                pass
+            return
 
         # проверяем, что добавивший — сотрудник
-        from bot.services.sheets import is_employee
-        if not is_employee(ambassador):
+        if not is_employee:
             # не сотрудник — игнорируем
             return
 
         # сохраняем привязку
-        write_chat_link(ambassador, chat_id)
+        await write_chat_link(ambassador, chat_id)
 
         # отправляем подтверждение
         try:
@@ -48,7 +60,11 @@ async def on_bot_added(event: ChatMemberUpdated):
 from aiogram import types
 from aiogram.filters import Command
 @router.message(Command("bind"))
-async def manual_bind(message: types.Message):
+async def manual_bind(
+    message: types.Message,
+    ambassador: str | None,
+    is_employee: bool | None,
+):
     """
     Ручная привязка чата командой /bind.
     Работает в группе, даже если Telegram не прислал my_chat_member.
@@ -58,19 +74,19 @@ async def manual_bind(message: types.Message):
         await message.answer("Команда доступна только в группах.")
         return
 
-    username = message.from_user.username
-    if not username:
+    if not ambassador:
         return
 
-    ambassador = f"@{username}"
+    if is_employee is None:
+        await message.reply("Не удалось проверить права: таблица недоступна. Повтори /bind чуть позже.")
+        return
 
     # проверяем, что это сотрудник
-    from bot.services.sheets import is_employee, write_chat_link
-    if not is_employee(ambassador):
+    if not is_employee:
         return
 
     chat_id = message.chat.id
-    write_chat_link(ambassador, chat_id)
+    await write_chat_link(ambassador, chat_id)
 
     await message.reply(
         f"Чат успешно привязан к амбассадору {ambassador}.\n"
@@ -1,6 +1,8 @@
 from aiogram import Router, types, F
+from aiogram.filters import Command
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from bot.services.sheets import read_sheet, update_cell
+from bot.services import sheets
+from bot.services.sheets_async import enqueue_request_status, run
 
 
 router = Router()
@@ -19,36 +21,29 @@ def confirm_keyboard(request_id: str):
 async def confirm_request(callback: types.CallbackQuery):
     request_id = callback.data.split("_")[1]
 
-    rows = read_sheet("Заявки")
-
-    # Ищем нужную строку
-    for index, row in enumerate(rows, start=1):
-        if len(row) > 9 and row[9] == request_id:
-            update_cell(index, "I", "Да", "Заявки")
-            await callback.message.edit_text("Заявка подтверждена.")
-            await callback.answer("Готово")
-            return
-
-    await callback.answer("Не найдено", show_alert=True)
+    # проверяем по индексу строк (лист перечитывается при промахе не чаще раза
+    # в интервал), сама запись уйдёт при сбросе очереди вместе с другими нажатиями
+    if await run(sheets.find_row_by_request_id, request_id) is None:
+        await callback.answer("Не найдено", show_alert=True)
+        return
+    await enqueue_request_status(request_id, "Да", "Заявки", "I")
+    await callback.message.edit_text("Заявка подтверждена.")
+    await callback.answer("Готово")
 
 @router.callback_query(F.data.startswith("reject_"))
 async def reject_request(callback: types.CallbackQuery):
     request_id = callback.data.split("_")[1]
 
-    rows = read_sheet("Заявки")
-
-    for index, row in enumerate(rows, start=1):
-        if len(row) > 9 and row[9] == request_id:
-            update_cell(index, "I", "Нет", "Заявки")
-            await callback.message.edit_text("Заявка отмечена как НЕ ОТГРУЖЕНА.")
-            await callback.answer("Зафиксировано")
-            return
-
-    await callback.answer("Не найдено", show_alert=True)
+    if await run(sheets.find_row_by_request_id, request_id) is None:
+        await callback.answer("Не найдено", show_alert=True)
+        return
+    await enqueue_request_status(request_id, "Нет", "Заявки", "I")
+    await callback.message.edit_text("Заявка отмечена как НЕ ОТГРУЖЕНА.")
+    await callback.answer("Зафиксировано")
 
 
 # Обработчик команды /setchat
-@router.message(commands=["setchat"])
+@router.message(Command("setchat"))
 async def set_chat_start(message: types.Message):
     await message.answer("Отправь мне *ID чата*, куда бот должен присылать заявки.\n\nЧтобы получить ID:\n1. Добавь бота в чат\n2. Напиши в чат любое сообщение\n3. Перешли это сообщение сюда", parse_mode="Markdown")
     pending_chat_setup[message.from_user.id] = True
@@ -1,4 +1,5 @@
-from bot.services.sheets import get_venues_by_ambassador
+from bot.services import sheets_async, submissions
+from bot.services.venues import get_venue_by_id, get_venue_index, get_venues, search_venues
 from aiogram.types import (
     InlineKeyboardMarkup,
     InlineKeyboardButton,
@@ -8,6 +9,8 @@ from aiogram.types import (
 )
 
 EST_PAGE_SIZE = 10
+# сколько ароматов максимум показываем в результатах поиска
+SKU_SEARCH_LIMIT = 50
 
 
 def _get_ambassador_username(username: str | None, user_id: int) -> str | None:
@@ -20,12 +23,12 @@ def _get_ambassador_username(username: str | None, user_id: int) -> str | None:
     return f"@{username}"
 
 
-def get_establishments_for(username: str | None):
+async def get_establishments_for(username: str | None):
     """Получить список заведений, привязанных к амбассадору."""
     amb = _get_ambassador_username(username, 0)
     if not amb:
         return []
-    return get_venues_by_ambassador(amb)
+    return list(await get_venues(amb))
 
 def build_establishments_keyboard(establishments, page: int = 0):
     start = page * EST_PAGE_SIZE
@@ -33,7 +36,7 @@ def build_establishments_keyboard(establishments, page: int = 0):
     page_items = establishments[start:end]
 
     buttons = [
-        [InlineKeyboardButton(text=e, callback_data=f"est_{e}")]
+        [InlineKeyboardButton(text=e.name, callback_data=VenueCallback(id=e.id).pack())]
         for e in page_items
     ]
 
@@ -50,10 +53,13 @@ def build_establishments_keyboard(establishments, page: int = 0):
 from aiogram import Router, F, types
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from bot.keyboards.callbacks import SkuCallback, VenueCallback
 from bot.keyboards.lines import get_lines_keyboard
-from bot.keyboards.sku import get_sku_keyboard
-from bot.services.sheets import append_row, get_chat_link, read_sheet
-from bot.services.sheets import update_status
+from bot.keyboards.sku import build_sku_search_keyboard, get_sku_keyboard
+from bot.services.catalog import Catalog, get_catalog
+from bot.services.draft import RequestDraft
+from bot.services.prefetch import warm_submission_caches
+from bot.utils import normalize_username
 from datetime import datetime
 from aiogram.utils.deep_linking import decode_payload
 from aiogram.exceptions import TelegramBadRequest
@@ -111,9 +117,9 @@ async def start_request(message: types.Message, state: FSMContext):
     # прячем клавиатуру меню, чтобы не нажимали "Создать заявку" повторно
     await message.answer("Начинаем заявку.", reply_markup=ReplyKeyboardRemove())
     await state.set_state(RequestForm.establishment)
-    establishments = get_establishments_for(message.from_user.username)
+    establishments = await get_establishments_for(message.from_user.username)
     if establishments:
-        await state.update_data(est_page=0, items={})
+        await state.update_data(est_page=0, draft=RequestDraft().dump())
         keyboard = build_establishments_keyboard(establishments, 0)
         await message.answer("Выбери заведение:", reply_markup=keyboard)
     else:
@@ -121,20 +127,24 @@ async def start_request(message: types.Message, state: FSMContext):
 
 @router.message(RequestForm.establishment)
 async def search_or_set_establishment(message: types.Message, state: FSMContext):
-    establishments = get_establishments_for(message.from_user.username)
-    query = message.text.strip().lower()
+    establishments = await get_establishments_for(message.from_user.username)
+    query = message.text.strip()
 
-    # Если есть список заведений — делаем поиск
+    # Если есть список заведений — делаем нечёткий поиск по индексу (лучшие — первыми)
     if establishments:
-        matched = [e for e in establishments if query in e.lower()]
+        scored = await search_venues(
+            _get_ambassador_username(message.from_user.username, 0), query
+        )
+        matched = [venue for venue, _ in scored]
 
         if len(matched) == 0:
             await message.answer("Ничего не найдено. Попробуй иначе.")
             return
 
-        if len(matched) == 1:
-            # Найдено одно — выбираем автоматически
-            await state.update_data(establishment=matched[0])
+        # Найдено одно и запрос входит в него целиком — выбираем автоматически;
+        # одно нечёткое совпадение («Ромашка Плюс» → «Ромашка») только предлагаем кнопкой
+        if len(matched) == 1 and scored[0][1] >= 1:
+            await state.update_data(establishment=matched[0].name)
             await state.set_state(RequestForm.line)
             await message.answer(
                 "Выбери линейку (можно несколько):",
@@ -142,10 +152,11 @@ async def search_or_set_establishment(message: types.Message, state: FSMContext)
             )
             return
 
-        # Нашлось несколько — показываем варианты
+        # Нашлось несколько или одно похожее — показываем варианты
         keyboard = build_establishments_keyboard(matched, 0)
-        await state.update_data(est_page=0, est_search=matched)
-        await message.answer("Найдено несколько вариантов:", reply_markup=keyboard)
+        await state.update_data(est_page=0, est_search=[v.id for v in matched])
+        text = "Найдено несколько вариантов:" if len(matched) > 1 else "Похожее заведение:"
+        await message.answer(text, reply_markup=keyboard)
         return
 
     # Если списка нет — работаем как раньше
@@ -157,29 +168,38 @@ async def search_or_set_establishment(message: types.Message, state: FSMContext)
     )
 
 
+async def _current_draft(state: FSMContext, data: dict) -> tuple[RequestDraft, Catalog]:
+    """Черновик из состояния, переведённый на текущий снапшот каталога."""
+    catalog = await get_catalog()
+    draft = RequestDraft.load(data)
+    if draft.catalog != catalog.digest:
+        if not draft.bind(catalog):
+            print(f"[draft] catalog {catalog.digest}: previous snapshot unknown, selection reset")
+        await state.update_data(draft=draft.dump())
+    return draft, catalog
+
+
 @router.callback_query(RequestForm.line, F.data.startswith("line_"))
 async def set_line(callback: types.CallbackQuery, state: FSMContext):
     # line_id здесь — индекс колонки в листе SKU
     line_id = callback.data.replace("line_", "")
     data = await state.get_data()
-    items = data.get("items") or {}
-    selected_for_line = set(items.get(line_id, []))
+    draft, _ = await _current_draft(state, data)
 
     print(f"[set_line] user={callback.from_user.id} line={line_id}")
-    await state.update_data(current_line_id=line_id, items=items)
+    await state.update_data(current_line_id=line_id)
     await state.set_state(RequestForm.sku)
     await callback.message.edit_text(
         "Выбери ароматы в этой линейке (можно несколько):",
-        reply_markup=await get_sku_keyboard(line_id, selected_for_line),
+        reply_markup=await get_sku_keyboard(line_id, draft.mask(line_id)),
     )
 
 
 @router.callback_query(RequestForm.line, F.data == "lines_done")
 async def lines_done(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    items = data.get("items") or {}
 
-    if not items:
+    if RequestDraft.load(data).is_empty():
         await callback.answer(
             "Ты ещё не выбрал ни одного аромата.", show_alert=True
         )
@@ -241,16 +261,16 @@ async def back_to_lines(callback: types.CallbackQuery, state: FSMContext):
         )
 
 # RE-INSERT toggle_sku handler immediately after back_to_lines
-@router.callback_query(F.data.startswith("sku_"))
-async def toggle_sku(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(SkuCallback.filter())
+async def toggle_sku(
+    callback: types.CallbackQuery,
+    callback_data: SkuCallback,
+    state: FSMContext,
+):
     print("CALLBACK RAW:", callback.data)
     print("MESSAGE_ID:", callback.message.message_id)
     print("FROM CHAT:", callback.message.chat.id)
     """Вкл/выкл аромат в выбранной линейке (галочка)."""
-    sku = callback.data.replace("sku_", "")
-    # игнорируем служебные кнопки
-    if sku in {"back", "done"}:
-        return
     data = await state.get_data()
     line_id = data.get("current_line_id")
 
@@ -258,21 +278,27 @@ async def toggle_sku(callback: types.CallbackQuery, state: FSMContext):
         await callback.answer("Сначала выбери линейку.")
         return
 
-    items = data.get("items") or {}
-    current = set(items.get(line_id, []))
-
-    if sku in current:
-        current.remove(sku)
-    else:
-        current.add(sku)
+    draft, catalog = await _current_draft(state, data)
+    line = catalog.get_line(str(callback_data.line))
+    sku = line.sku_at(callback_data.i) if line else None
+    if callback_data.c != catalog.token or sku is None or line.id != line_id:
+        # кнопка от прежнего содержимого листа — показываем актуальную клавиатуру
+        await callback.answer("Список ароматов обновился, выбери ещё раз.")
+        try:
+            await callback.message.edit_reply_markup(
+                reply_markup=await get_sku_keyboard(line_id, draft.mask(line_id))
+            )
+        except TelegramBadRequest:
+            pass
+        return
 
-    items[line_id] = list(current)
-    await state.update_data(items=items)
+    mask = draft.toggle(line_id, callback_data.i)
+    await state.update_data(draft=draft.dump())
 
-    print(f"[toggle_sku] user={callback.from_user.id} line={line_id} items={current}")
+    print(f"[toggle_sku] user={callback.from_user.id} line={line_id} mask={mask:b}")
     try:
         await callback.message.edit_reply_markup(
-            reply_markup=await get_sku_keyboard(line_id, current)
+            reply_markup=await get_sku_keyboard(line_id, mask)
         )
     except TelegramBadRequest as exc:
         print(f"[toggle_sku] TelegramBadRequest: {exc}")
@@ -283,7 +309,7 @@ async def toggle_sku(callback: types.CallbackQuery, state: FSMContext):
 @router.message(RequestForm.sku)
 async def search_sku(message: types.Message, state: FSMContext):
     """Поиск аромата по введённому тексту в текущей линейке."""
-    query = message.text.strip().lower()
+    query = message.text.strip()
     if not query:
         await message.answer("Напиши часть названия аромата.")
         return
@@ -294,52 +320,36 @@ async def search_sku(message: types.Message, state: FSMContext):
         await message.answer("Сначала выбери линейку.")
         return
 
-    try:
-        col = int(line_id)
-    except (TypeError, ValueError):
-        col = 0
-
-    rows = read_sheet("SKU")
-    if not rows:
+    draft, catalog = await _current_draft(state, data)
+    if not catalog.rows:
         await message.answer("Не могу прочитать список ароматов.")
         return
 
-    items = data.get("items") or {}
-    selected = set(items.get(line_id, []))
-
-    found: list[str] = []
-    for row in rows[1:]:
-        if len(row) <= col:
-            continue
-        name = str(row[col]).strip()
-        if not name:
-            continue
-        if query in name.lower():
-            found.append(name)
+    found = catalog.search_skus(line_id, query, limit=SKU_SEARCH_LIMIT)
 
     if not found:
         await message.answer("Ничего не найдено, попробуй иначе.")
         return
 
-    buttons = []
-    for name in found:
-        text = f"✅ {name}" if name in selected else name
-        buttons.append(
-            [InlineKeyboardButton(text=text, callback_data=f"sku_{name}")]
-        )
-
-    buttons.append(
-        [
-            InlineKeyboardButton(
-                text="⬅ Назад к линейкам", callback_data="sku_back"
-            )
-        ]
-    )
-
+    await state.update_data(sku_search=found)
     await message.answer(
         "Нашёл такие ароматы, выбери нужные:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
+        reply_markup=build_sku_search_keyboard(catalog, line_id, found, draft.mask(line_id), 0),
+    )
+
+
+@router.callback_query(F.data.startswith("skupage_"))
+async def paginate_sku_search(callback: types.CallbackQuery, state: FSMContext):
+    page = int(callback.data.replace("skupage_", ""))
+    data = await state.get_data()
+    found = data.get("sku_search") or []
+    line_id = data.get("current_line_id")
+    draft, catalog = await _current_draft(state, data)
+
+    await callback.message.edit_reply_markup(
+        reply_markup=build_sku_search_keyboard(catalog, line_id, found, draft.mask(line_id), page)
     )
+    await callback.answer()
 
 
 @router.message(RequestForm.person)
@@ -349,16 +359,23 @@ async def set_person(message: types.Message, state: FSMContext):
     await message.answer("Контакт (телефон или ссылка на Telegram):")
 
 @router.message(RequestForm.contact)
-async def finish_request(message: types.Message, state: FSMContext):
+async def finish_request(
+    message: types.Message,
+    state: FSMContext,
+    ambassador: str | None,
+    is_employee: bool | None,
+):
     data = await state.get_data()
 
-    # Проверка: заявки могут создавать только сотрудники
-    from bot.services.sheets import is_employee
-
-    username = message.from_user.username
-    ambassador = f"@{username}" if username else None
+    # список сотрудников не прочитался — черновик не трогаем, пусть повторит
+    if ambassador and is_employee is None:
+        await message.answer(
+            "Не удалось проверить права: таблица недоступна. Отправь контакт ещё раз чуть позже."
+        )
+        return
 
-    if not ambassador or not is_employee(ambassador):
+    # Проверка: заявки могут создавать только сотрудники
+    if not ambassador or not is_employee:
         await message.answer(
             "У тебя нет прав создавать заявки. Обратись к руководителю.",
             reply_markup=get_main_menu(),
@@ -371,12 +388,10 @@ async def finish_request(message: types.Message, state: FSMContext):
     chat_id = message.chat.id
     msg_id = message.message_id
 
-    ambassador_username = _get_ambassador_username(
-        message.from_user.username, message.from_user.id
-    )
-    dest_chat = (
-        get_chat_link(ambassador_username) if ambassador_username is not None else None
-    )
+    # устаревшие кэши (чаты, каталог) — одним batchGet, а не чтением на каждый лист
+    await warm_submission_caches()
+
+    dest_chat = await sheets_async.get_chat_link(ambassador)
     if not dest_chat:
         await message.answer(
             "Ошибка: у тебя не привязан чат дистрибьютора в листе 'Амбассадоры'.",
@@ -387,16 +402,16 @@ async def finish_request(message: types.Message, state: FSMContext):
 
     # Собираем колонки по линейкам из заголовка листа SKU:
     # в каждой ячейке список ароматов через запятую.
-    sku_sheet = read_sheet("SKU")
-    header = sku_sheet[0] if sku_sheet else []
-    line_order: list[tuple[str, str]] = []
-    for idx, line_name in enumerate(header):
-        name = str(line_name).strip()
-        if not name:
-            continue
-        line_order.append((str(idx), name))  # (line_index, line_name)
-
-    items = data.get("items") or {}
+    draft, catalog = await _current_draft(state, data)
+    if draft.is_empty():
+        # лист SKU изменился, а прежний снапшот уже неизвестен — выбор сброшен
+        await state.set_state(RequestForm.line)
+        await message.answer(
+            "Список ароматов обновился, выбери ароматы ещё раз:",
+            reply_markup=await get_lines_keyboard(add_done=True),
+        )
+        return
+    line_order = [(line.id, line.name) for line in catalog.lines]  # (line_index, line_name)
 
     # Базовые колонки
     row_values = [
@@ -411,7 +426,7 @@ async def finish_request(message: types.Message, state: FSMContext):
     # Далее по каждой линейке колонка с ароматами через запятую
     description_lines = []
     for line_id, line_name in line_order:
-        line_items = items.get(line_id, [])
+        line_items = draft.names(catalog, line_id)
         if line_items:
             cell_value = ", ".join(line_items)
             row_values.append(cell_value)
@@ -419,21 +434,17 @@ async def finish_request(message: types.Message, state: FSMContext):
         else:
             row_values.append("")
 
-    # Статус и message_id в конце строки
+    # Статус в конце строки; последнюю колонку (message_id сообщения
+    # дистрибьютора) допишет конвейер заявок после отправки уведомления
     row_values.append("")      # статус (пока пустой)
-    row_values.append(msg_id)  # message_id
-
-    append_row(row_values)
-
-    await message.answer(
-        "Заявка создана и отправлена в таблицу.",
-        reply_markup=get_main_menu(),
-    )
 
     # Текст заявки для чата дистрибьютора
     details_text = "\n".join(description_lines) if description_lines else "—"
 
-    await message.bot.send_message(
+    # заявка сохраняется в журнал конвейера: уведомление и запись в таблицу
+    # идут в фоне, амбассадор получает ответ сразу
+    await submissions.submit(
+        key=f"{chat_id}:{msg_id}",
         chat_id=int(dest_chat),
         text=(
             f"Заявка от {user}\n"
@@ -442,22 +453,22 @@ async def finish_request(message: types.Message, state: FSMContext):
             f"С кем вёлся диалог: {data.get('person') or '—'}\n"
             f"Контакт: {message.text}"
         ),
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="✅ Подтверждено", callback_data="confirm"),
-                InlineKeyboardButton(text="❌ Не отгружено", callback_data="reject")
-            ]
-        ])
+        row=row_values,
+        fallback_message_id=msg_id,
     )
-
     await state.clear()
 
+    await message.answer(
+        "Заявка создана и отправлена в таблицу.",
+        reply_markup=get_main_menu(),
+    )
+
 # Обработка подтверждения заявки
 @router.callback_query(F.data == "confirm")
 async def confirm_request(callback: types.CallbackQuery):
     text = callback.message.text
     await callback.answer("Подтверждено", show_alert=False)
-    update_status(callback.message.message_id, "YES")
+    await sheets_async.enqueue_status(callback.message.message_id, "YES")
     await callback.message.edit_text(text + "\n\n✅ Подтверждено")
 
 # Обработка отказа (не отгружено)
@@ -465,13 +476,21 @@ async def confirm_request(callback: types.CallbackQuery):
 async def reject_request(callback: types.CallbackQuery):
     text = callback.message.text
     await callback.answer("Отмечено как не отгружено", show_alert=False)
-    update_status(callback.message.message_id, "NO")
+    await sheets_async.enqueue_status(callback.message.message_id, "NO")
     await callback.message.edit_text(text + "\n\n❌ Не отгружено")
 
-@router.callback_query(F.data.startswith("est_"))
-async def choose_establishment(callback: types.CallbackQuery, state: FSMContext):
-    est = callback.data.replace("est_", "")
-    await state.update_data(establishment=est, items={})
+@router.callback_query(VenueCallback.filter())
+async def choose_establishment(
+    callback: types.CallbackQuery,
+    callback_data: VenueCallback,
+    state: FSMContext,
+    ambassador: str | None,
+):
+    venue = await get_venue_by_id(callback_data.id)
+    if venue is None or venue.ambassador != normalize_username(ambassador):
+        await callback.answer("Заведение не найдено, список обновился.", show_alert=True)
+        return
+    await state.update_data(establishment=venue.name, draft=RequestDraft().dump())
     await state.set_state(RequestForm.line)
     await callback.message.edit_text(
         "Выбери линейку (можно несколько):",
@@ -482,9 +501,21 @@ async def choose_establishment(callback: types.CallbackQuery, state: FSMContext)
 async def paginate_establishments(callback: types.CallbackQuery, state: FSMContext):
     page = int(callback.data.replace("estpage_", ""))
     data = await state.get_data()
-    establishments = data.get("est_search") or get_establishments_for(
-        callback.from_user.username
-    )
+    if data.get("est_search"):
+        # в состоянии хранятся id найденных заведений
+        index = await get_venue_index()
+        establishments = [
+            venue for venue in map(index.get_by_id, data["est_search"]) if venue is not None
+        ]
+    else:
+        establishments = await get_establishments_for(callback.from_user.username)
     await state.update_data(est_page=page)
     keyboard = build_establishments_keyboard(establishments, page)
     await callback.message.edit_reply_markup(reply_markup=keyboard)
+
+
+# Кнопки со старым форматом callback_data (sku_<название>, est_<название>),
+# отправленные до перехода на SkuCallback/VenueCallback
+@router.callback_query(F.data.startswith(("sku_", "est_")))
+async def outdated_button(callback: types.CallbackQuery):
+    await callback.answer("Эта клавиатура устарела, начни заявку заново.", show_alert=True)
@@ -0,0 +1,44 @@
+from aiogram import Router, types
+from aiogram.filters import Command
+
+from bot.handlers.admin import is_admin
+from bot.services import sheets_async
+from bot.services.requests_db import query_requests
+
+router = Router()
+
+# статус, который ставит кнопка «✅ Подтверждено»
+CONFIRMED_STATUS = "YES"
+
+
+async def _can_manage_chat(message: types.Message) -> bool:
+    if is_admin(message):
+        return True
+    member = await message.bot.get_chat_member(message.chat.id, message.from_user.id)
+    return member.status in {"creator", "administrator"}
+
+
+# /confirm_all — в чате дистрибьютора подтвердить все заявки без статуса
+@router.message(Command("confirm_all"))
+async def confirm_all(message: types.Message):
+    if message.chat.type not in {"group", "supergroup"}:
+        await message.answer("Команда работает в чате дистрибьютора.")
+        return
+    if not await _can_manage_chat(message):
+        await message.answer("Подтвердить все заявки может только администратор чата.")
+        return
+
+    # ожидающие заявки этого чата — из зеркала по индексу (dest_chat, status_key)
+    pending = await query_requests(dest_chat=str(message.chat.id), status="")
+    if not pending:
+        await message.answer("Заявок без статуса нет.")
+        return
+
+    # одна запись в журнал и один batchUpdate при ближайшем сбросе очереди
+    await sheets_async.enqueue_statuses(
+        [(r["message_id"], CONFIRMED_STATUS) for r in pending]
+    )
+    await message.answer(
+        f"Подтверждено заявок: {len(pending)}.\n"
+        "Кнопки под старыми сообщениями остаются — ими можно поменять статус отдельной заявки."
+    )
@@ -1,54 +1,81 @@
+import asyncio
+
 from aiogram import Router, types
+from aiogram.exceptions import TelegramRetryAfter
 from aiogram.filters import Command
-from bot.services.sheets import get_all_requests
+from bot.services.requests_db import iter_requests
+from bot.utils import MessageChunker
 
 router = Router()
 
-# /confirmed — показать подтверждённые заявки
-@router.message(Command("confirmed"))
-async def confirmed_requests(message: types.Message):
-    rows = get_all_requests()
-    confirmed = [r for r in rows if len(r) > 8 and r[8].strip().lower() in ("yes", "да", "подтверждено")] 
 
-    if not confirmed:
-        await message.answer("Нет подтверждённых заявок.")
+async def _answer(message: types.Message, text: str):
+    # длинный отчёт — это много сообщений подряд, ждём, если Telegram просит
+    while True:
+        try:
+            await message.answer(text)
+            return
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+
+
+async def send_report(message: types.Message, header: str, rows, render, empty_text: str):
+    """
+    Отправить отчёт частями: строки берутся из `rows` (async-итератор по
+    зеркалу заявок) по мере готовности сообщений, каждое не длиннее лимита Telegram.
+    """
+    chunker = MessageChunker(header)
+    found = False
+    async for r in rows:
+        found = True
+        for text in chunker.add(render(r)):
+            await _answer(message, text)
+
+    if not found:
+        await message.answer(empty_text)
         return
 
-    text = "Подтверждённые заявки:\n\n"
-    for r in confirmed:
-        text += f"Аромат: {r[6]} | Линейка: {r[5]} | Контакт: {r[4]}\n"
+    tail = chunker.finish()
+    if tail:
+        await _answer(message, tail)
 
-    await message.answer(text)
 
-# /unconfirmed — показать НЕ подтверждённые заявки
-@router.message(Command("unconfirmed"))
-async def unconfirmed_requests(message: types.Message):
-    rows = get_all_requests()
-    unconfirmed = [r for r in rows if len(r) > 8 and (r[8] == "" or r[8].strip().lower() in ("no", "нет", "не отгружено"))]
+def _short(r: dict) -> str:
+    return f"Ароматы: {r['lines'] or '—'} | Заведение: {r['venue']} | Контакт: {r['contact']}"
 
-    if not unconfirmed:
-        await message.answer("Все заявки подтверждены.")
-        return
 
-    text = "Неподтверждённые заявки:\n\n"
-    for r in unconfirmed:
-        text += f"Аромат: {r[6]} | Линейка: {r[5]} | Контакт: {r[4]}\n"
+# /confirmed — показать подтверждённые заявки
+@router.message(Command("confirmed"))
+async def confirmed_requests(message: types.Message):
+    await send_report(
+        message,
+        "Подтверждённые заявки:\n\n",
+        iter_requests(status="yes"),
+        _short,
+        "Нет подтверждённых заявок.",
+    )
 
-    await message.answer(text)
+# /unconfirmed — показать НЕ подтверждённые заявки
+@router.message(Command("unconfirmed"))
+async def unconfirmed_requests(message: types.Message):
+    await send_report(
+        message,
+        "Неподтверждённые заявки:\n\n",
+        iter_requests(statuses=("", "no")),
+        _short,
+        "Все заявки подтверждены.",
+    )
 
 # /all — все заявки
 @router.message(Command("all"))
 async def all_requests(message: types.Message):
-    rows = get_all_requests()
-    if not rows:
-        await message.answer("Заявок нет.")
-        return
-
-    text = "Все заявки:\n\n"
-    for r in rows:
-        text += f"Аромат: {r[6]} | Линейка: {r[5]} | Статус: {r[8] or '—'}\n"
-
-    await message.answer(text)
+    await send_report(
+        message,
+        "Все заявки:\n\n",
+        iter_requests(),
+        lambda r: f"Ароматы: {r['lines'] or '—'} | Заведение: {r['venue']} | Статус: {r['status'] or '—'}",
+        "Заявок нет.",
+    )
 
 # /by_line <название> — сортировка по линейке
 @router.message(Command("by_line"))
@@ -58,19 +85,13 @@ async def by_line(message: types.Message):
         await message.answer("Укажи линейку. Пример: /by_line CLASSIC")
         return
 
-    line = parts[1].strip().lower()
-    rows = get_all_requests()
-    filtered = [r for r in rows if r[5].strip().lower() == line]
-
-    if not filtered:
-        await message.answer("По этой линейке нет заявок.")
-        return
-
-    text = f"Заявки по линейке {parts[1]}:\n\n"
-    for r in filtered:
-        text += f"Аромат: {r[6]} | Контакт: {r[4]} | Статус: {r[8] or '—'}\n"
-
-    await message.answer(text)
+    await send_report(
+        message,
+        f"Заявки по линейке {parts[1]}:\n\n",
+        iter_requests(line=parts[1]),
+        lambda r: f"Ароматы: {r['lines']} | Контакт: {r['contact']} | Статус: {r['status'] or '—'}",
+        "По этой линейке нет заявок.",
+    )
 
 # /by_amb <имя> — сортировка по амбассадору
 @router.message(Command("by_amb"))
@@ -80,16 +101,13 @@ async def by_amb(message: types.Message):
         await message.answer("Укажи имя амбассадора. Пример: /by_amb Виктор")
         return
 
-    ambassador = parts[1].strip().lower()
-    rows = get_all_requests()
-    filtered = [r for r in rows if len(r) > 1 and r[1].strip().lower() == ambassador]
-
-    if not filtered:
-        await message.answer("По этому амбассадору нет заявок.")
-        return
-
-    text = f"Заявки амбассадора {parts[1]}:\n\n"
-    for r in filtered:
-        text += f"Заведение: {r[3]} | Адрес: {r[4]} | Линейка: {r[5]} | Аромат: {r[6]} | Статус: {r[8] or '—'}\n"
-
-    await message.answer(text)
+    await send_report(
+        message,
+        f"Заявки амбассадора {parts[1]}:\n\n",
+        iter_requests(ambassador=parts[1]),
+        lambda r: (
+            f"Заведение: {r['venue']} | Ароматы: {r['lines'] or '—'} | "
+            f"Контакт: {r['contact']} | Статус: {r['status'] or '—'}"
+        ),
+        "По этому амбассадору нет заявок.",
+    )
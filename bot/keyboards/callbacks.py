@@ -0,0 +1,29 @@
+"""
+Компактные callback_data для кнопок с названиями.
+
+В кнопке передаются только числовые id, названия восстанавливаются по
+кэшированному каталогу и индексу заведений. Так callback_data всегда
+укладывается в 64 байта Telegram, а одинаковые начала длинных названий
+не склеиваются в один ключ.
+
+  sku:<отпечаток каталога>:<линейка>:<номер аромата в линейке>
+  est:<id заведения>
+
+Оба id выводятся из содержимого листа, а не из счётчиков процесса, поэтому
+кнопки, пережившие перезапуск бота, не указывают на другой аромат или
+заведение.
+"""
+from aiogram.filters.callback_data import CallbackData
+
+
+class SkuCallback(CallbackData, prefix="sku"):
+    # отпечаток каталога (Catalog.token): после изменения листа SKU номера
+    # ароматов могли сдвинуться
+    c: str
+    line: int
+    i: int
+
+
+class VenueCallback(CallbackData, prefix="est"):
+    # id — хэш (амбассадор, название), см. build_venue_index
+    id: int
@@ -0,0 +1,11 @@
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+
+def get_distributor_keyboard() -> InlineKeyboardMarkup:
+    """Кнопки под заявкой в чате дистрибьютора (callback_data: confirm / reject)."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✅ Подтверждено", callback_data="confirm"),
+            InlineKeyboardButton(text="❌ Не отгружено", callback_data="reject")
+        ]
+    ])
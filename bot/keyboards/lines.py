@@ -1,38 +1,52 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from bot.services.sheets import read_sheet
+from bot.services.catalog import get_catalog
 
 
 async def get_lines_keyboard(add_done: bool = False) -> InlineKeyboardMarkup:
     """
-    Клавиатура с линейками на основе заголовка листа SKU.
+    Клавиатура с линейками на основе заголовка листа SKU (из кэша каталога).
 
     Ожидается структура листа SKU:
       - первая строка: названия линеек (Bliss, White Line, Black Line, Cigar Line)
       - ниже по столбцам — ароматы.
 
     callback_data для выбора линейки: line_<index>, где index — номер столбца (0,1,2,...).
+
+    Клавиатура собирается один раз на версию каталога.
     """
     try:
-        rows = read_sheet("SKU")
+        catalog = await get_catalog()
     except Exception as e:
         print(f"[get_lines_keyboard] ERROR reading sheet: {e}")
         return InlineKeyboardMarkup(inline_keyboard=[])
 
-    if not rows:
+    if not catalog.lines:
         return InlineKeyboardMarkup(inline_keyboard=[])
 
-    header = rows[0]
+    global _markups_version
+    if _markups_version != catalog.version:
+        _markups.clear()
+        _markups_version = catalog.version
+    markup = _markups.get(add_done)
+    if markup is None:
+        markup = _markups[add_done] = _build_lines_keyboard(catalog, add_done)
+    return markup
+
+
+# add_done → готовая клавиатура для текущей версии каталога
+_markups: dict[bool, InlineKeyboardMarkup] = {}
+_markups_version: int | None = None
+
+
+def _build_lines_keyboard(catalog, add_done: bool) -> InlineKeyboardMarkup:
     buttons = []
 
-    for idx, line_name in enumerate(header):
-        name = str(line_name).strip()
-        if not name:
-            continue
+    for line in catalog.lines:
         buttons.append(
             [
                 InlineKeyboardButton(
-                    text=name,
-                    callback_data=f"line_{idx}",
+                    text=line.name,
+                    callback_data=f"line_{line.id}",
                 )
             ]
         )
@@ -1,79 +1,152 @@
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-from bot.services.sheets import read_sheet
+from bot.keyboards.callbacks import SkuCallback
+from bot.services.catalog import Catalog, get_catalog
+
+
+# сколько отрисованных клавиатур (линейка + набор галочек) держать готовыми
+SKU_KEYBOARD_CACHE_SIZE = 512
+
+
+class _SkuSkeleton:
+    """
+    Неизменная часть клавиатуры линейки для одной версии каталога:
+    по кнопке без галочки и с галочкой на каждый аромат (в порядке битов
+    маски выбора) плюс управляющие кнопки.
+    Хэшируется по идентичности, поэтому служит ключом LRU отрисовок.
+    """
+
+    __slots__ = ("buttons", "footer")
+
+    def __init__(self, token: str, line_id: str, skus: tuple[str, ...]):
+        self.buttons = []
+        for position, sku_name in enumerate(skus):
+            callback_data = SkuCallback(c=token, line=int(line_id), i=position).pack()
+            self.buttons.append((
+                [InlineKeyboardButton(text=sku_name, callback_data=callback_data)],
+                [InlineKeyboardButton(text=f"✅ {sku_name}", callback_data=callback_data)],
+            ))
+        self.footer = [
+            [
+                InlineKeyboardButton(
+                    text="✅ Готово с этой линейкой",
+                    callback_data="sku_done",
+                )
+            ],
+            [
+                InlineKeyboardButton(
+                    text="⬅ Назад к линейкам",
+                    callback_data="sku_back",
+                )
+            ],
+        ]
+
+
+_skeletons: dict[str, _SkuSkeleton] = {}
+_skeletons_version: int | None = None
+
+
+def _get_skeleton(catalog, line_id: str) -> _SkuSkeleton:
+    global _skeletons_version
+    if _skeletons_version != catalog.version:
+        _skeletons.clear()
+        _skeletons_version = catalog.version
+    skeleton = _skeletons.get(line_id)
+    if skeleton is None:
+        line = catalog.get_line(line_id)
+        skeleton = _skeletons[line_id] = _SkuSkeleton(
+            catalog.token, line_id, line.skus if line else ()
+        )
+    return skeleton
+
+
+@lru_cache(maxsize=SKU_KEYBOARD_CACHE_SIZE)
+def _render(skeleton: _SkuSkeleton, selected: int) -> InlineKeyboardMarkup:
+    rows = [
+        checked if selected >> i & 1 else plain
+        for i, (plain, checked) in enumerate(skeleton.buttons)
+    ]
+    rows.extend(skeleton.footer)
+    # кнопки уже провалидированы при сборке скелета
+    return InlineKeyboardMarkup.model_construct(inline_keyboard=rows)
 
 
 async def get_sku_keyboard(
     line_index: str,
-    selected: set[str] | None = None,
+    selected: int = 0,
 ) -> InlineKeyboardMarkup:
     """
     Клавиатура с ароматами по выбранной линейке.
 
-    Лист SKU:
+    Лист SKU (из кэша каталога, без обращений к Sheets):
       - первая строка: названия линеек (линии)
       - далее: в каждой колонке свои ароматы.
 
     line_index — индекс колонки (строка) из callback_data: line_<index>.
 
+    selected — битовая маска выбранных ароматов линейки (см. RequestDraft).
     При нажатии на аромат он помечается галочкой (мультивыбор).
-    callback_data для SKU: sku_<название>
+    callback_data для SKU: SkuCallback (отпечаток каталога, линейка, номер аромата).
 
     Дополнительно добавляются кнопки:
       - ✅ Готово с этой линейкой (sku_done)
       - ⬅ Назад к линейкам (sku_back)
+
+    Кнопки линейки собираются один раз на версию каталога, на каждый тап
+    только расставляются галочки; частые наборы берутся из LRU готовыми.
     """
-    rows = read_sheet("SKU")
-    if not rows:
+    catalog = await get_catalog()
+    if not catalog.rows:
         return InlineKeyboardMarkup(inline_keyboard=[])
 
-    # безопасно парсим индекс колонки
-    try:
-        col = int(line_index)
-    except (TypeError, ValueError):
-        col = 0
+    skeleton = _get_skeleton(catalog, str(line_index))
+    return _render(skeleton, selected)
 
-    selected = selected or set()
-    buttons: list[list[InlineKeyboardButton]] = []
 
-    # пропускаем заголовок (первую строку с названиями линеек)
-    for row in rows[1:]:
-        if len(row) <= col:
-            continue
+SKU_SEARCH_PAGE_SIZE = 10
 
-        sku_name = str(row[col]).strip()
 
-        # пропускаем пустые и технические значения, чтобы не ломать логику
-        if not sku_name or sku_name.lower() in {"back", "sku_back", "назад", "⬅"}:
+def build_sku_search_keyboard(
+    catalog: Catalog,
+    line_id: str,
+    found: list[str],
+    selected: int = 0,
+    page: int = 0,
+) -> InlineKeyboardMarkup:
+    """
+    Результаты поиска ароматов постранично (как build_establishments_keyboard).
+    Листание: skupage_<номер страницы>.
+    """
+    start = page * SKU_SEARCH_PAGE_SIZE
+    end = start + SKU_SEARCH_PAGE_SIZE
+    line = catalog.get_line(line_id)
+    positions = line.positions if line else {}
+
+    buttons = []
+    for name in found[start:end]:
+        position = positions.get(name)
+        if position is None:
             continue
-
-        key = sku_name[:20]  # безопасный короткий ключ, используется и в selected, и в callback_data
-
-        text = f"✅ {sku_name}" if key in selected else sku_name
-
+        text = f"✅ {name}" if selected >> position & 1 else name
+        callback_data = SkuCallback(c=catalog.token, line=int(line_id), i=position).pack()
         buttons.append(
-            [
-                InlineKeyboardButton(
-                    text=text,
-                    callback_data=f"sku_{key}",
-                )
-            ]
+            [InlineKeyboardButton(text=text, callback_data=callback_data)]
         )
 
-    # Управляющие кнопки по линейке
-    buttons.append(
-        [
-            InlineKeyboardButton(
-                text="✅ Готово с этой линейкой",
-                callback_data="sku_done",
-            )
-        ]
-    )
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="⏮ Назад", callback_data=f"skupage_{page-1}"))
+    if end < len(found):
+        nav.append(InlineKeyboardButton(text="Вперёд ⏭", callback_data=f"skupage_{page+1}"))
+    if nav:
+        buttons.append(nav)
+
     buttons.append(
         [
             InlineKeyboardButton(
-                text="⬅ Назад к линейкам",
-                callback_data="sku_back",
+                text="⬅ Назад к линейкам", callback_data="sku_back"
             )
         ]
     )
@@ -0,0 +1,37 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from bot.services.employees import is_employee
+
+
+class IdentityMiddleware(BaseMiddleware):
+    """
+    Один раз на апдейт определяет, кто пишет боту, и кладёт в данные хэндлера:
+      ambassador  — '@username' отправителя или None, если username не задан
+      is_employee — есть ли он в листе «Сотрудники» (из кэша, без запроса к таблице);
+                    None, если список сотрудников прочитать не удалось
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        ambassador = f"@{user.username}" if user and user.username else None
+
+        employee: bool | None = False
+        if ambassador:
+            try:
+                employee = await is_employee(ambassador)
+            except Exception as e:
+                # права неизвестны — хэндлер не должен считать это отказом
+                print(f"[IdentityMiddleware] ERROR reading employees: {e}")
+                employee = None
+
+        data["ambassador"] = ambassador
+        data["is_employee"] = employee
+        return await handler(event, data)
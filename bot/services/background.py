@@ -0,0 +1,31 @@
+"""Периодические фоновые задачи бота (обновление кэшей, синхронизации)."""
+import asyncio
+
+from bot.services import sheets
+
+_tasks: dict[str, asyncio.Task] = {}
+
+
+async def _run_periodic(name: str, interval: float, func):
+    # запросы к таблице из фоновых задач уступают квоту пользовательским
+    with sheets.background_priority():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await func()
+            except Exception as e:
+                print(f"[background:{name}] ERROR: {e}")
+
+
+def start_periodic(name: str, interval: float, func):
+    """Запустить `await func()` каждые `interval` секунд (один раз на имя)."""
+    if name in _tasks or interval <= 0:
+        return
+    _tasks[name] = asyncio.create_task(_run_periodic(name, interval, func))
+
+
+async def stop_all():
+    for task in _tasks.values():
+        task.cancel()
+    await asyncio.gather(*_tasks.values(), return_exceptions=True)
+    _tasks.clear()
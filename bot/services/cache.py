@@ -0,0 +1,71 @@
+"""
+Кэш снапшота данных из таблицы с TTL и single-flight обновлением.
+
+Пока снапшот свежий, `get()` отдаёт его без обращения к Sheets.
+Если он устарел или сброшен, первый вызов запускает загрузку, а остальные
+одновременные вызовы ждут ту же загрузку и не делают повторных запросов.
+
+Фоновое обновление идёт с фоновым приоритетом квоты Sheets. Пользователь не
+присоединяется к такой загрузке (иначе ждал бы с фоновым приоритетом), а
+получает прежний снапшот, пока она не закончится.
+"""
+import asyncio
+import time
+
+from bot.services import sheets
+
+
+class SnapshotCache:
+    def __init__(self, name: str, loader, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._loader = loader
+        self._value = None
+        self._loaded_at = 0.0
+        self._task: asyncio.Task | None = None
+        self._task_background = False
+
+    @property
+    def expired(self) -> bool:
+        return self._value is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def peek(self):
+        """Текущий снапшот (возможно устаревший) без загрузки, либо None."""
+        return self._value
+
+    def prime(self, value):
+        """Положить в кэш уже загруженный снапшот."""
+        self._value = value
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Пометить снапшот устаревшим: следующий `get()` перечитает таблицу."""
+        self._loaded_at = 0.0
+
+    async def get(self):
+        if not self.expired:
+            return self._value
+        if self._task is not None and self._task_background and self._value is not None:
+            # идёт фоновое обновление — отдаём прежний снапшот, а не ждём его
+            return self._value
+        return await self.refresh()
+
+    async def refresh(self):
+        if self._task is None:
+            self._task_background = sheets.in_background()
+            self._task = asyncio.ensure_future(self._load())
+        # shield: отмена одного ожидающего не отменяет общую загрузку
+        return await asyncio.shield(self._task)
+
+    async def _load(self):
+        try:
+            value = await self._loader()
+        except Exception as e:
+            if self._value is None:
+                raise
+            print(f"[cache:{self.name}] ERROR refreshing, serving stale: {e}")
+            return self._value
+        finally:
+            self._task = None
+        self.prime(value)
+        return value
@@ -0,0 +1,164 @@
+"""
+Кэш каталога ароматов (лист SKU).
+
+Лист SKU:
+  - первая строка: названия линеек
+  - далее: в каждой колонке свои ароматы.
+
+Снапшот неизменяемый: кнопки, поиск и запись заявки читают его без
+обращений к Sheets. Версия снапшота растёт только при реальном изменении
+листа.
+Поисковые индексы по линейкам строятся вместе со снапшотом и заменяются
+вместе с ним.
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+from bot.config import CATALOG_TTL
+from bot.services import sheets_async
+from bot.services.cache import SnapshotCache
+from bot.services.search import PrefixIndex
+
+SKU_SHEET = "SKU"
+
+# технические значения, которые не должны становиться ароматами
+_TECH_NAMES = {"back", "sku_back", "назад", "⬅"}
+
+
+@dataclass(frozen=True)
+class Line:
+    id: str  # индекс колонки в листе SKU (как в callback_data line_<id>)
+    name: str
+    skus: tuple[str, ...]
+    # аромат → его номер в skus (номер уходит в callback_data кнопки)
+    positions: dict[str, int] = field(default_factory=dict, compare=False)
+
+    def sku_at(self, position: int) -> str | None:
+        return self.skus[position] if 0 <= position < len(self.skus) else None
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: int
+    lines: tuple[Line, ...]
+    rows: tuple[tuple[str, ...], ...]
+    # id линейки → поиск по ароматам этой линейки
+    search: dict[str, PrefixIndex] = field(default_factory=dict, compare=False)
+    # отпечаток содержимого листа: в отличие от версии, одинаков и после перезапуска
+    digest: str = field(default="", compare=False)
+
+    @property
+    def token(self) -> str:
+        """Короткий отпечаток для callback_data: совпадает только у снапшотов с тем же листом."""
+        return self.digest[:8]
+
+    def get_line(self, line_id: str) -> Line | None:
+        for line in self.lines:
+            if line.id == str(line_id):
+                return line
+        return None
+
+    def search_skus(self, line_id: str, query: str, limit: int = 50) -> list[str]:
+        """Ароматы линейки по началу слов запроса, без обращений к Sheets."""
+        index = self.search.get(str(line_id))
+        if index is None:
+            return []
+        return index.search(query, limit=limit)
+
+
+def parse_catalog(rows: list, version: int) -> Catalog:
+    frozen_rows = tuple(tuple(str(v) for v in row) for row in rows)
+    digest = hashlib.blake2b(repr(frozen_rows).encode(), digest_size=8).hexdigest()
+    if not frozen_rows:
+        return Catalog(version=version, lines=(), rows=(), digest=digest)
+
+    header = frozen_rows[0]
+    lines = []
+    for idx, line_name in enumerate(header):
+        name = line_name.strip()
+        if not name:
+            continue
+        skus = []
+        for row in frozen_rows[1:]:
+            if len(row) <= idx:
+                continue
+            sku_name = row[idx].strip()
+            if not sku_name or sku_name.lower() in _TECH_NAMES:
+                continue
+            skus.append(sku_name)
+        positions: dict[str, int] = {}
+        for position, sku_name in enumerate(skus):
+            positions.setdefault(sku_name, position)
+        lines.append(Line(id=str(idx), name=name, skus=tuple(skus), positions=positions))
+
+    return Catalog(
+        version=version,
+        lines=tuple(lines),
+        rows=frozen_rows,
+        search={line.id: PrefixIndex((sku, sku) for sku in line.skus) for line in lines},
+        digest=digest,
+    )
+
+
+# несколько последних снапшотов по отпечатку: черновики заявок, начатые
+# до изменения листа, переводятся на новый снапшот по названиям ароматов
+_RECENT_SNAPSHOTS = 4
+_recent: dict[str, Catalog] = {}
+
+
+def _remember(catalog: Catalog) -> Catalog:
+    _recent.pop(catalog.digest, None)
+    _recent[catalog.digest] = catalog
+    while len(_recent) > _RECENT_SNAPSHOTS:
+        del _recent[next(iter(_recent))]
+    return catalog
+
+
+def get_snapshot(digest: str) -> Catalog | None:
+    """Недавний снапшот каталога по отпечатку, либо None."""
+    return _recent.get(digest)
+
+
+def _next_snapshot(rows: list) -> Catalog:
+    current = _cache.peek()
+    if current is None:
+        return _remember(parse_catalog(rows, 1))
+    parsed = parse_catalog(rows, current.version + 1)
+    # лист не менялся — оставляем прежний снапшот и его версию
+    return current if parsed.rows == current.rows else _remember(parsed)
+
+
+async def _load_catalog() -> Catalog:
+    rows = await sheets_async.read_sheet(SKU_SHEET)
+    return _next_snapshot(rows)
+
+
+_cache = SnapshotCache("catalog", _load_catalog, CATALOG_TTL)
+
+
+async def get_catalog() -> Catalog:
+    return await _cache.get()
+
+
+async def refresh_catalog() -> Catalog:
+    return await _cache.refresh()
+
+
+def invalidate_catalog():
+    _cache.invalidate()
+
+
+def catalog_expired() -> bool:
+    return _cache.expired
+
+
+def prime_catalog(rows: list) -> Catalog:
+    """Положить в кэш уже прочитанный лист SKU (например, из batch_get)."""
+    catalog = _next_snapshot(rows)
+    _cache.prime(catalog)
+    return catalog
+
+
+def peek_catalog() -> Catalog | None:
+    """Текущий снапшот без загрузки (для синхронного кода), либо None."""
+    return _cache.peek()
@@ -0,0 +1,85 @@
+"""
+Черновик заявки в FSM: выбранные ароматы как битовые маски по линейкам.
+
+Бит i в маске линейки — аромат `line.skus[i]` снапшота каталога с
+отпечатком `catalog`. Тап по аромату меняет одно число, а в хранилище
+состояния уходит короткий словарь вместо списков названий. В названия
+черновик превращается только при записи заявки (`names`).
+
+Если лист SKU изменился во время заявки, `bind` переводит маски на новый
+снапшот по названиям ароматов; исчезнувшие из листа ароматы выпадают.
+"""
+from dataclasses import dataclass, field
+
+from bot.services.catalog import Catalog, get_snapshot
+
+# ключ черновика в данных FSM
+STATE_KEY = "draft"
+
+
+@dataclass(slots=True)
+class RequestDraft:
+    # отпечаток снапшота каталога, к которому относятся номера битов
+    catalog: str = ""
+    # id линейки → маска выбранных ароматов
+    masks: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, data: dict) -> "RequestDraft":
+        raw = data.get(STATE_KEY) or {}
+        return cls(raw.get("c", ""), {line_id: int(m) for line_id, m in raw.get("m", {}).items()})
+
+    def dump(self) -> dict:
+        return {"c": self.catalog, "m": {line_id: m for line_id, m in self.masks.items() if m}}
+
+    def is_empty(self) -> bool:
+        return not any(self.masks.values())
+
+    def mask(self, line_id: str) -> int:
+        return self.masks.get(line_id, 0)
+
+    def toggle(self, line_id: str, position: int) -> int:
+        mask = self.masks.get(line_id, 0) ^ (1 << position)
+        self.masks[line_id] = mask
+        return mask
+
+    def bind(self, catalog: Catalog) -> bool:
+        """
+        Привязать черновик к снапшоту каталога. False — прежний снапшот уже
+        неизвестен (например, после перезапуска бота), и выбор пришлось сбросить.
+        """
+        if self.catalog == catalog.digest:
+            return True
+        old = get_snapshot(self.catalog)
+        self.catalog = catalog.digest
+        if self.is_empty():
+            self.masks.clear()
+            return True
+        if old is None:
+            self.masks.clear()
+            return False
+
+        masks = {}
+        for line_id, mask in self.masks.items():
+            old_line, line = old.get_line(line_id), catalog.get_line(line_id)
+            if old_line is None or line is None:
+                continue
+            new_mask = 0
+            for name in _selected(old_line.skus, mask):
+                position = line.positions.get(name)
+                if position is not None:
+                    new_mask |= 1 << position
+            masks[line_id] = new_mask
+        self.masks = masks
+        return True
+
+    def names(self, catalog: Catalog, line_id: str) -> list[str]:
+        """Названия выбранных ароматов линейки в порядке листа."""
+        line = catalog.get_line(line_id)
+        if line is None:
+            return []
+        return _selected(line.skus, self.mask(line_id))
+
+
+def _selected(skus: tuple[str, ...], mask: int) -> list[str]:
+    return [sku for i, sku in enumerate(skus) if mask >> i & 1]
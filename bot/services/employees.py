@@ -0,0 +1,55 @@
+"""
+Кэш списка сотрудников (лист «Сотрудники», колонка A: @username).
+
+Проверка прав — поиск в множестве нормализованных username; лист
+перечитывается только по истечении TTL или после сброса кэша.
+"""
+from bot.config import EMPLOYEES_TTL
+from bot.services import sheets_async
+from bot.services.cache import SnapshotCache
+from bot.utils import normalize_username
+
+EMPLOYEES_SHEET = "Сотрудники"
+
+
+def parse_employees(rows: list) -> frozenset[str]:
+    # пропускаем заголовок
+    return frozenset(
+        normalize_username(row[0]) for row in rows[1:] if row and str(row[0]).strip()
+    )
+
+
+async def _load_employees() -> frozenset[str]:
+    return parse_employees(await sheets_async.read_sheet(EMPLOYEES_SHEET))
+
+
+_cache = SnapshotCache("employees", _load_employees, EMPLOYEES_TTL)
+
+
+async def get_employees() -> frozenset[str]:
+    return await _cache.get()
+
+
+async def is_employee(username: str | None) -> bool:
+    if not username:
+        return False
+    return normalize_username(username) in await get_employees()
+
+
+async def refresh_employees() -> frozenset[str]:
+    return await _cache.refresh()
+
+
+def invalidate_employees():
+    _cache.invalidate()
+
+
+def employees_expired() -> bool:
+    return _cache.expired
+
+
+def prime_employees(rows: list) -> frozenset[str]:
+    """Положить в кэш уже прочитанный лист сотрудников (например, из batch_get)."""
+    employees = parse_employees(rows)
+    _cache.prime(employees)
+    return employees
@@ -0,0 +1,129 @@
+"""
+Хранилище FSM в SQLite вместо MemoryStorage.
+
+Черновики заявок переживают перезапуск бота, а брошенные сессии
+удаляются по TTL, поэтому память не растёт бесконечно. Недавно
+использованные сессии держатся в памяти (LRU ограниченного размера),
+чтение остальных и все записи идут в SQLite в отдельном потоке и не
+блокируют цикл событий. Данные хранятся компактным JSON.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+
+def _key(key: StorageKey) -> str:
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(self, path: str, ttl: float, hot_size: int = 1000):
+        self.ttl = ttl
+        self.hot_size = hot_size
+        # одна нить на соединение: sqlite3 не любит конкурентный доступ
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm")
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fsm ("
+            " key TEXT PRIMARY KEY,"
+            " state TEXT,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS fsm_updated_at ON fsm (updated_at)")
+        self._db.commit()
+        # key → (state, data в JSON, время последнего изменения)
+        self._hot: OrderedDict[str, tuple[str | None, str, float]] = OrderedDict()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _select(self, key: str):
+        return self._db.execute(
+            "SELECT state, data, updated_at FROM fsm WHERE key = ?", (key,)
+        ).fetchone()
+
+    def _write(self, key: str, state: str | None, data: str, updated_at: float):
+        if state is None and data == "{}":
+            self._db.execute("DELETE FROM fsm WHERE key = ?", (key,))
+        else:
+            self._db.execute(
+                "INSERT INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET"
+                " state = excluded.state, data = excluded.data, updated_at = excluded.updated_at",
+                (key, state, data, updated_at),
+            )
+        self._db.commit()
+
+    def _purge(self, older_than: float) -> int:
+        cur = self._db.execute("DELETE FROM fsm WHERE updated_at < ?", (older_than,))
+        self._db.commit()
+        return cur.rowcount
+
+    def _remember(self, key: str, record: tuple[str | None, str, float]):
+        self._hot[key] = record
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    async def _load(self, key: str) -> tuple[str | None, str, float]:
+        record = self._hot.get(key)
+        if record is None:
+            row = await self._run(self._select, key)
+            record = tuple(row) if row else (None, "{}", time.time())
+            self._remember(key, record)
+        else:
+            self._hot.move_to_end(key)
+
+        # просроченная сессия — как пустая
+        if time.time() - record[2] > self.ttl:
+            return None, "{}", record[2]
+        return record
+
+    async def _save(self, key: str, state: str | None, data: str):
+        now = time.time()
+        self._remember(key, (state, data, now))
+        await self._run(self._write, key, state, data, now)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        k = _key(key)
+        _, data, _ = await self._load(k)
+        await self._save(k, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _, _ = await self._load(_key(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        k = _key(key)
+        state, _, _ = await self._load(k)
+        await self._save(k, state, _dumps(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data, _ = await self._load(_key(key))
+        return json.loads(data)
+
+    async def purge_expired(self) -> int:
+        """Удалить сессии, простаивающие дольше TTL."""
+        older_than = time.time() - self.ttl
+        for k in [k for k, record in self._hot.items() if record[2] < older_than]:
+            del self._hot[k]
+        return await self._run(self._purge, older_than)
+
+    async def close(self) -> None:
+        await self._run(self._db.close)
+        self._executor.shutdown(wait=True)
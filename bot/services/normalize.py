@@ -0,0 +1,59 @@
+"""
+Нормализация названий и адресов заведений для ключей дедупликации и поиска.
+
+Регулярные выражения скомпилированы один раз, служебные слова адреса
+вырезаются за один проход и только целыми словами («г.» внутри слова
+не трогаем). Повторяющиеся адреса и пары название+адрес берутся из LRU-кэша.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable
+
+_CACHE_SIZE = 65536
+
+_YO = str.maketrans({"ё": "е"})
+
+# служебные слова адреса целиком, вместе с запятой и пробелами после них
+_ADDRESS_JUNK_RE = re.compile(
+    r"(?<!\w)(?:(?:россия|рф|город)(?!\w)|г\.)\s*,?\s*"
+)
+
+
+def normalize_text(value: str) -> str:
+    """Базовая нормализация строки: нижний регистр, ё→е, сжатие пробелов."""
+    if not value:
+        return ""
+    return " ".join(value.lower().translate(_YO).split())
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def normalize_address(address: str) -> str:
+    """Нормализация адреса без служебных слов (россия, рф, город, г.)."""
+    if not address:
+        return ""
+    address = _ADDRESS_JUNK_RE.sub(" ", normalize_text(address))
+    return " ".join(address.split())
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _venue_key(name: str, address: str) -> str:
+    base = normalize_text(name)
+    norm_addr = normalize_address(address) if address else ""
+    if norm_addr:
+        return f"{base} ({norm_addr})"
+    return base
+
+
+def normalize_venue_name(name: str, address: str | None = None) -> str:
+    """Нормализованный ключ заведения: имя + (адрес) в одном формате."""
+    return _venue_key(name or "", address or "")
+
+
+def normalize_addresses(addresses: Iterable[str]) -> list[str]:
+    """Нормализация целой колонки адресов."""
+    return [normalize_address(a) for a in addresses]
+
+
+def normalize_venue_keys(names: Iterable[str], addresses: Iterable[str]) -> list[str]:
+    """Ключи заведений для колонок названий и адресов одинаковой длины."""
+    return list(map(_venue_key, names, addresses))
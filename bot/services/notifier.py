@@ -0,0 +1,159 @@
+"""
+Очередь исходящих уведомлений в Telegram с учётом лимитов.
+
+Хэндлер кладёт сообщение в очередь и сразу возвращается. У каждого чата
+своя очередь и свой воркер, так что сообщения в один чат уходят строго по
+порядку, а медленная группа не задерживает остальные. Отправки разносятся
+во времени по общему лимиту бота и лимиту чата; на RetryAfter воркер ждёт
+указанное время и повторяет то же сообщение, не нарушая порядок.
+"""
+import asyncio
+from collections import deque
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from aiogram.types import Message
+
+from bot.config import (
+    NOTIFY_MAX_ATTEMPTS,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE,
+    TELEGRAM_PRIVATE_RATE,
+)
+
+
+class _RateLimiter:
+    """Не чаще одного события в `interval` секунд."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        at = max(now, self._next)
+        self._next = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    def pause(self, seconds: float):
+        """Сдвинуть следующую отправку (после RetryAfter)."""
+        now = asyncio.get_running_loop().time()
+        self._next = max(self._next, now + seconds)
+
+
+class _ChatQueue:
+    def __init__(self, interval: float):
+        self.items: deque[tuple[Bot, dict, asyncio.Future]] = deque()
+        self.limiter = _RateLimiter(interval)
+        self.task: asyncio.Task | None = None
+
+
+class Notifier:
+    def __init__(self, global_rate: float, private_rate: float, group_rate_per_minute: float):
+        self._global = _RateLimiter(1 / global_rate)
+        self._private_interval = 1 / private_rate
+        self._group_interval = 60 / group_rate_per_minute
+        self._chats: dict[int, _ChatQueue] = {}
+        self.sent = 0
+        self.failed = 0
+        self.retry_after = 0
+
+    def _chat(self, chat_id: int) -> _ChatQueue:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            # отрицательный id — группа или канал, у них лимит строже
+            interval = self._group_interval if chat_id < 0 else self._private_interval
+            chat = self._chats[chat_id] = _ChatQueue(interval)
+        return chat
+
+    def send_message(self, bot: Bot, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+        """
+        Поставить сообщение в очередь чата. Возвращает future с отправленным
+        Message; ждать его не обязательно — ошибки доставки логируются.
+        """
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_log_failure)
+        chat = self._chat(chat_id)
+        chat.items.append((bot, dict(chat_id=chat_id, text=text, **kwargs), future))
+        if chat.task is None or chat.task.done():
+            chat.task = asyncio.create_task(self._run_chat(chat))
+        return future
+
+    async def _deliver(self, chat: _ChatQueue, bot: Bot, params: dict) -> Message:
+        attempt = 0
+        while True:
+            await chat.limiter.wait()
+            await self._global.wait()
+            try:
+                message = await bot.send_message(**params)
+                self.sent += 1
+                return message
+            except TelegramRetryAfter as e:
+                self.retry_after += 1
+                chat.limiter.pause(e.retry_after)
+            except TelegramNetworkError:
+                attempt += 1
+                if attempt >= NOTIFY_MAX_ATTEMPTS:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+    async def _run_chat(self, chat: _ChatQueue):
+        while chat.items:
+            bot, params, future = chat.items[0]
+            try:
+                message = await self._deliver(chat, bot, params)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(message)
+            chat.items.popleft()
+
+    def depth(self) -> int:
+        return sum(len(chat.items) for chat in self._chats.values())
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retry_after": self.retry_after,
+        }
+
+    async def drain(self):
+        """Дождаться отправки всего, что уже в очереди (при остановке бота)."""
+        tasks = [chat.task for chat in self._chats.values() if chat.task and not chat.task.done()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _log_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"[notifier] ERROR: {future.exception()}")
+
+
+_notifier: Notifier | None = None
+
+
+def get_notifier() -> Notifier:
+    global _notifier
+    if _notifier is None:
+        _notifier = Notifier(TELEGRAM_GLOBAL_RATE, TELEGRAM_PRIVATE_RATE, TELEGRAM_GROUP_RATE)
+    return _notifier
+
+
+def send_message(bot: Bot, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+    return get_notifier().send_message(bot, chat_id, text, **kwargs)
+
+
+def notifier_stats() -> dict:
+    return get_notifier().stats()
+
+
+async def drain():
+    await get_notifier().drain()
@@ -0,0 +1,38 @@
+"""
+Прогрев кэшей перед записью заявки.
+
+Для заявки нужны лист сотрудников, привязки чатов и каталог SKU. Если
+какие-то из этих кэшей устарели, они читаются одним запросом
+values.batchGet вместо отдельного чтения на каждый лист; свежие кэши не
+трогаются.
+"""
+from bot.services import catalog, employees, sheets, sheets_async
+
+CHATS_SHEET = "Чаты"
+
+
+async def warm_submission_caches():
+    expired = []
+    if employees.employees_expired():
+        expired.append(employees.EMPLOYEES_SHEET)
+    if sheets.chat_links_expired(CHATS_SHEET):
+        expired.append(CHATS_SHEET)
+    if catalog.catalog_expired():
+        expired.append(catalog.SKU_SHEET)
+    if not expired:
+        return
+
+    try:
+        rows = await sheets_async.batch_get(expired)
+    except Exception as e:
+        # кэши дочитаются по отдельности при обращении
+        print(f"[prefetch] ERROR: {e}")
+        return
+
+    if employees.EMPLOYEES_SHEET in rows:
+        employees.prime_employees(rows[employees.EMPLOYEES_SHEET])
+    if CHATS_SHEET in rows:
+        # под блокировкой связок, которую может держать запись /bind — не в event loop
+        await sheets_async.run(sheets.prime_chat_links, rows[CHATS_SHEET], CHATS_SHEET)
+    if catalog.SKU_SHEET in rows:
+        catalog.prime_catalog(rows[catalog.SKU_SHEET])
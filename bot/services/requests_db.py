@@ -0,0 +1,311 @@
+"""
+Локальное зеркало листа «Заявки» в SQLite для отчётных команд.
+
+Строки попадают сюда из собственных записей бота (подписка на записи в
+sheets.py) и периодической догрузкой новых строк листа. Отчёты — это
+запросы по индексам (статус, амбассадор, линейка, дата), без скачивания
+листа целиком.
+
+Формат строки листа (см. get_all_requests):
+  0 - дата, 1 - амбассадор, 2 - chat_id дистрибьютора, 3 - заведение,
+  4 - с кем вёлся диалог, 5 - контакт, 6..N-3 - линейки,
+  N-2 - статус, N-1 - message_id
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from bot.config import REQUESTS_DB_FILE
+from bot.services import sheets, sheets_async
+from bot.services.catalog import peek_catalog
+
+REQUESTS_SHEET = "Заявки"
+
+_STATUS_KEYS = {
+    "yes": "yes", "да": "yes", "подтверждено": "yes",
+    "no": "no", "нет": "no", "не отгружено": "no",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    row INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    date_iso TEXT NOT NULL DEFAULT '',
+    ambassador TEXT NOT NULL,
+    ambassador_key TEXT NOT NULL,
+    dest_chat TEXT NOT NULL,
+    venue TEXT NOT NULL,
+    person TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    status TEXT NOT NULL,
+    status_key TEXT NOT NULL,
+    message_id TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS request_lines (
+    row INTEGER NOT NULL,
+    line TEXT NOT NULL,
+    line_key TEXT NOT NULL,
+    items TEXT NOT NULL,
+    PRIMARY KEY (row, line)
+);
+CREATE INDEX IF NOT EXISTS request_lines_line ON request_lines (line_key, row);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# индексы по date_iso создаются после миграции старой таблицы (см. _migrate)
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS requests_status ON requests (status_key, date_iso);
+CREATE INDEX IF NOT EXISTS requests_ambassador ON requests (ambassador_key, date_iso);
+CREATE INDEX IF NOT EXISTS requests_date ON requests (date_iso);
+CREATE INDEX IF NOT EXISTS requests_dest_chat ON requests (dest_chat, status_key);
+"""
+
+# В каком виде дата приходит из листа: бот пишет ISO, но после правки
+# ячейки вручную Sheets отдаёт её в формате отображения (17.10.2026 20:11:00)
+_DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y",
+)
+
+
+def status_key(status: str) -> str:
+    return _STATUS_KEYS.get(str(status).strip().lower(), "")
+
+
+def date_iso(value: str) -> str:
+    """Дата из листа в ISO (YYYY-MM-DD HH:MM:SS), чтобы сортировка по строке шла по времени."""
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    # неизвестный формат — оставляем как есть, строка хотя бы не потеряется
+    return text
+
+
+class RequestsMirror:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+        self._migrate()
+        self._db.executescript(_INDEXES)
+        self._db.commit()
+
+    def _migrate(self):
+        """Зеркало старой версии: добавить date_iso, заполнить и пересоздать индексы по дате."""
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(requests)")}
+        if "date_iso" in columns:
+            return
+        self._db.execute("ALTER TABLE requests ADD COLUMN date_iso TEXT NOT NULL DEFAULT ''")
+        rows = self._db.execute("SELECT row, date FROM requests").fetchall()
+        self._db.executemany(
+            "UPDATE requests SET date_iso = ? WHERE row = ?",
+            [(date_iso(row["date"]), row["row"]) for row in rows],
+        )
+        for name in ("requests_status", "requests_ambassador", "requests_date"):
+            self._db.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def _get_meta(self, key: str, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def _set_meta(self, key: str, value):
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
+
+    def _line_names(self, count: int) -> list[str]:
+        header = self._get_meta("header")
+        if header and len(header) >= 6 + count:
+            return [str(name).strip() for name in header[6:6 + count]]
+        # заголовка в листе нет — колонки линеек идут в порядке каталога
+        catalog = peek_catalog()
+        names = [line.name for line in catalog.lines] if catalog else []
+        return [names[i] if i < len(names) else f"#{i + 1}" for i in range(count)]
+
+    def _upsert(self, row_number: int, row: list):
+        if len(row) < 8:
+            return
+        if str(row[0]).strip().lower() in ("дата", "date"):
+            self._set_meta("header", row)
+            return
+
+        values = [str(v) for v in row]
+        status = values[-2]
+        self._db.execute(
+            "INSERT OR REPLACE INTO requests"
+            " (row, date, date_iso, ambassador, ambassador_key, dest_chat, venue, person,"
+            "  contact, status, status_key, message_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                row_number, values[0], date_iso(values[0]), values[1], values[1].strip().lower(), values[2],
+                values[3], values[4], values[5], status, status_key(status), values[-1],
+            ),
+        )
+        self._db.execute("DELETE FROM request_lines WHERE row = ?", (row_number,))
+        line_cells = values[6:-2]
+        for name, items in zip(self._line_names(len(line_cells)), line_cells):
+            if items.strip():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO request_lines (row, line, line_key, items)"
+                    " VALUES (?, ?, ?, ?)",
+                    (row_number, name, name.lower(), items),
+                )
+
+    def on_sheet_write(self, event: str, sheet_name: str, row_number: int | None, payload):
+        """Подписчик sheets.add_write_listener: свои записи бота сразу в зеркало."""
+        if sheet_name != REQUESTS_SHEET or row_number is None:
+            return
+        with self._lock:
+            if event == "append":
+                for offset, row in enumerate(payload):
+                    self._upsert(row_number + offset, row)
+            elif event == "status":
+                self._db.execute(
+                    "UPDATE requests SET status = ?, status_key = ? WHERE row = ?",
+                    (str(payload), status_key(payload), row_number),
+                )
+            self._db.commit()
+
+    def pull_new_rows(self) -> int:
+        """Догрузить строки листа, появившиеся после прошлой догрузки."""
+        with self._lock:
+            pulled_until = self._get_meta("pulled_until", 0)
+
+        count = 0
+        last_row = pulled_until
+        for row_number, row in sheets.iter_sheet_rows(REQUESTS_SHEET, start_row=pulled_until + 1):
+            with self._lock:
+                self._upsert(row_number, row)
+            last_row = row_number
+            count += 1
+
+        with self._lock:
+            self._set_meta("pulled_until", last_row)
+            self._db.commit()
+        return count
+
+    def refresh_statuses(self) -> int:
+        """
+        Перечитать статусы уже загруженных строк: догрузка берёт только новые
+        строки, а статус могут поменять в таблице руками или другим процессом.
+        Ширина строк разная (число линеек), поэтому читаем строки целиком
+        постранично и обновляем только статус. Возвращает число изменённых строк.
+        """
+        with self._lock:
+            pulled_until = self._get_meta("pulled_until", 0)
+        if not pulled_until:
+            return 0
+
+        changed = []
+        for row_number, row in sheets.iter_sheet_rows(REQUESTS_SHEET):
+            if row_number > pulled_until:
+                break
+            if len(row) < 8:
+                continue
+            changed.append((str(row[-2]), status_key(row[-2]), row_number, str(row[-2])))
+
+        with self._lock:
+            cursor = self._db.executemany(
+                "UPDATE requests SET status = ?, status_key = ? WHERE row = ? AND status != ?",
+                changed,
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def query(
+        self,
+        status: str | None = None,
+        statuses: tuple[str, ...] | None = None,
+        ambassador: str | None = None,
+        line: str | None = None,
+        dest_chat: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict]:
+        """
+        Заявки по фильтрам (все — по индексам), новые первыми.
+        В поле lines — ароматы по линейкам одной строкой.
+        """
+        where, params = [], []
+        if status is not None:
+            statuses = (status,)
+        if statuses is not None:
+            where.append(f"r.status_key IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if ambassador is not None:
+            where.append("r.ambassador_key = ?")
+            params.append(ambassador.strip().lower())
+        if dest_chat is not None:
+            where.append("r.dest_chat = ?")
+            params.append(str(dest_chat))
+        if line is not None:
+            where.append(
+                "r.row IN (SELECT row FROM request_lines WHERE line_key = ?)"
+            )
+            params.append(line.strip().lower())
+
+        sql = (
+            "SELECT r.*, (SELECT group_concat(l.line || ': ' || l.items, '; ')"
+            "  FROM request_lines l WHERE l.row = r.row) AS lines"
+            " FROM requests r"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.date_iso DESC, r.row DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend((limit, offset))
+
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+
+_mirror: RequestsMirror | None = None
+
+
+def get_mirror() -> RequestsMirror:
+    global _mirror
+    if _mirror is None:
+        _mirror = RequestsMirror(REQUESTS_DB_FILE)
+        sheets.add_write_listener(_mirror.on_sheet_write)
+    return _mirror
+
+
+async def pull_new_requests() -> int:
+    return await sheets_async.run(get_mirror().pull_new_rows)
+
+
+async def refresh_request_statuses() -> int:
+    return await sheets_async.run(get_mirror().refresh_statuses)
+
+
+async def query_requests(**filters) -> list[dict]:
+    return await asyncio.to_thread(get_mirror().query, **filters)
+
+
+async def iter_requests(page_size: int = 200, **filters):
+    """Заявки по фильтрам страницами из зеркала, без выборки всего результата сразу."""
+    offset = 0
+    while True:
+        page = await query_requests(limit=page_size, offset=offset, **filters)
+        for row in page:
+            yield row
+        if len(page) < page_size:
+            return
+        offset += page_size
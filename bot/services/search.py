@@ -0,0 +1,154 @@
+"""
+Нечёткий поиск по триграммам (как pg_trgm): опечатки, ё/е и транслит.
+
+Текст приводится к ключу поиска: normalize_text + транслитерация кириллицы
+в латиницу, поэтому «кофе», «Кофэ» и «kofe» дают близкие триграммы.
+Индекс хранит для каждой триграммы список документов, и поиск
+перебирает только документы с общими триграммами, а не все.
+"""
+import bisect
+import heapq
+from collections import Counter
+from itertools import chain
+
+from bot.services.normalize import normalize_text
+
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n",
+    "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f",
+    "х": "h", "ц": "c", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "y",
+    "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+
+def search_key(text: str) -> str:
+    return normalize_text(text).translate(_TRANSLIT)
+
+
+def trigrams(key: str) -> frozenset[str]:
+    """Триграммы по словам с отступами (начало слова весит больше)."""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """Индекс «триграмма → документы»; документы только добавляются."""
+
+    __slots__ = ("_items", "_keys", "_sizes", "_postings")
+
+    def __init__(self):
+        self._items: list = []
+        self._keys: list[str] = []
+        self._sizes: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item, text: str):
+        doc_id = len(self._items)
+        key = search_key(text)
+        grams = trigrams(key)
+        self._items.append(item)
+        self._keys.append(key)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(doc_id)
+
+    def search(self, query: str, limit: int = 50, threshold: float = 0.5) -> list:
+        return [item for item, _ in self.search_scored(query, limit, threshold)]
+
+    def search_scored(self, query: str, limit: int = 50, threshold: float = 0.5) -> list[tuple]:
+        """
+        Пары (документ, похожесть) по убыванию похожести: доля триграмм
+        запроса, найденных в документе (как word_similarity в pg_trgm), при
+        равенстве — более короткие документы. Длинный ключ с адресом не
+        «размывает» совпадение по названию. Если запрос входит в ключ
+        документа целиком, к похожести добавляется 1 (итог ≥ 1).
+        """
+        key = search_key(query)
+        grams = trigrams(key)
+        if not grams:
+            return []
+
+        # подсчёт общих триграмм целиком на стороне C (Counter + chain)
+        common = Counter(chain.from_iterable(
+            self._postings.get(gram, ()) for gram in grams
+        ))
+        min_hits = threshold * len(grams)
+
+        scored = []
+        for doc_id, hits in common.items():
+            if hits < min_hits:
+                continue
+            score = hits / len(grams)
+            # точное вхождение запроса всегда выше нечётких совпадений
+            if key in self._keys[doc_id]:
+                score += 1
+            scored.append((-score, self._sizes[doc_id], doc_id))
+
+        return [
+            (self._items[doc_id], -score)
+            for score, _, doc_id in heapq.nsmallest(limit, scored)
+        ]
+
+
+class PrefixIndex:
+    """
+    Поиск по началу слов: отсортированный список (слово, документ) и bisect.
+    Каждое слово запроса должно быть началом какого-то слова документа.
+    Выше те, чей ключ целиком начинается с запроса, дальше — порядок добавления.
+    Если по началу слов ничего нет, используется нечёткий поиск по триграммам.
+    """
+
+    __slots__ = ("_items", "_keys", "_tokens", "_fuzzy")
+
+    def __init__(self, entries):
+        """entries — пары (документ, текст для поиска)."""
+        self._items: list = []
+        self._keys: list[str] = []
+        self._fuzzy = TrigramIndex()
+        tokens: list[tuple[str, int]] = []
+        for item, text in entries:
+            doc_id = len(self._items)
+            key = search_key(text)
+            self._items.append(item)
+            self._keys.append(key)
+            self._fuzzy.add(doc_id, text)
+            tokens.extend((token, doc_id) for token in set(key.split()))
+        tokens.sort()
+        self._tokens = tokens
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _docs_with_prefix(self, prefix: str) -> set[int]:
+        docs = set()
+        i = bisect.bisect_left(self._tokens, (prefix,))
+        while i < len(self._tokens) and self._tokens[i][0].startswith(prefix):
+            docs.add(self._tokens[i][1])
+            i += 1
+        return docs
+
+    def search(self, query: str, limit: int = 50) -> list:
+        key = search_key(query)
+        words = key.split()
+        if not words:
+            return []
+
+        docs = self._docs_with_prefix(words[0])
+        for word in words[1:]:
+            if not docs:
+                break
+            docs &= self._docs_with_prefix(word)
+
+        if not docs:
+            return [self._items[doc_id] for doc_id in self._fuzzy.search(query, limit=limit)]
+
+        ranked = sorted(docs, key=lambda d: (not self._keys[d].startswith(key), d))
+        return [self._items[doc_id] for doc_id in ranked[:limit]]
@@ -1,140 +1,589 @@
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
-import re
+from googleapiclient.errors import HttpError
+import google_auth_httplib2
+import httplib2
+import contextvars
+import functools
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from bot.config import (
     SPREADSHEET_ID as TARGET_SPREADSHEET_ID,
     GOOGLE_SERVICE_FILE,
+    GOOGLE_TOKEN_REFRESH_MARGIN,
+    CHAT_LINKS_TTL,
+    SHEET_PAGE_SIZE,
+    ROW_INDEX_REBUILD_INTERVAL,
+    SHEETS_BACKOFF_BASE,
+    SHEETS_BACKOFF_MAX,
+    SHEETS_MAX_RETRIES,
+    SHEETS_READ_QUOTA,
+    SHEETS_WRITE_QUOTA,
     SOURCE_SPREADSHEET_ID,
+    VENUES_SYNC_STATE,
+    WRITE_QUEUE_DEAD_LETTER,
+    WRITE_QUEUE_FLUSH_INTERVAL,
+    WRITE_QUEUE_MAX_ATTEMPTS,
+    WRITE_QUEUE_JOURNAL,
 )
+from bot.services.normalize import (
+    normalize_venue_keys,
+    normalize_venue_name as _normalize_venue_name,
+)
+from bot.utils import normalize_username
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
-def _normalize_text(value: str) -> str:
-    """Базовая нормализация строки: нижний регистр, ё→е, сжатие пробелов."""
-    if not value:
-        return ""
-    value = value.strip().lower()
-    value = value.replace("ё", "е")
-    value = re.sub(r"\s+", " ", value)
-    return value
-
-
-def _normalize_address(address: str) -> str:
-    """Упрощённая нормализация адреса, убираем лишние служебные слова."""
-    if not address:
-        return ""
-    address = _normalize_text(address)
-    # максимально простая очистка, без жёстких правил
-    for junk in ["россия,", "рф,", "г.", "город", "россия", "рф"]:
-        address = address.replace(junk, "")
-    address = re.sub(r"\s+", " ", address)
-    return address.strip()
-
-
-def _normalize_venue_name(name: str, address: str | None = None) -> str:
-    """Нормализованный ключ заведения: имя + (адрес) в одном формате."""
-    base = _normalize_text(name)
-    if address:
-        norm_addr = _normalize_address(address)
-    else:
-        norm_addr = ""
-    if norm_addr:
-        return f"{base} ({norm_addr})"
-    return base
+class _SheetsClient:
+    """
+    Общий на весь процесс клиент Google Sheets.
+
+    Ключ сервисного аккаунта и discovery-документ разбираются один раз.
+    Сам объект `spreadsheets()` потокобезопасен только на этапе сборки запросов,
+    поэтому выполнение идёт через `execute()` с отдельным keep-alive
+    соединением на каждый поток.
+    """
+
+    def __init__(self, service_file: str):
+        self.credentials = Credentials.from_service_account_file(
+            service_file,
+            scopes=SCOPES,
+        )
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+        self._refresher: threading.Thread | None = None
+        service = build(
+            "sheets",
+            "v4",
+            http=self.http(),
+            cache_discovery=False,
+            static_discovery=True,
+        )
+        self.spreadsheets = service.spreadsheets()
+
+    def http(self) -> google_auth_httplib2.AuthorizedHttp:
+        """Авторизованное соединение текущего потока (httplib2 не потокобезопасен)."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.credentials, http=httplib2.Http()
+            )
+            self._local.http = http
+        return http
+
+    def refresh_token(self):
+        with self._refresh_lock:
+            request = google_auth_httplib2.Request(httplib2.Http())
+            self.credentials.refresh(request)
+
+    def _seconds_until_refresh(self) -> float:
+        expiry = self.credentials.expiry
+        if not self.credentials.token or expiry is None:
+            return 0
+        left = (expiry - datetime.utcnow()).total_seconds()
+        return max(left - GOOGLE_TOKEN_REFRESH_MARGIN, 0)
+
+    def _refresh_loop(self):
+        while True:
+            delay = self._seconds_until_refresh()
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            try:
+                self.refresh_token()
+            except Exception as e:
+                print(f"[sheets_token_refresh] ERROR: {e}")
+                time.sleep(30)
+
+    def start_refresher(self):
+        """Фоновое обновление OAuth-токена заранее, до истечения срока."""
+        if self._refresher is not None:
+            return
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            name="sheets-token-refresh",
+            daemon=True,
+        )
+        self._refresher.start()
+
+    def execute(self, request):
+        return request.execute(http=self.http())
+
+
+_client: _SheetsClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> _SheetsClient:
+    """Лениво создаёт общий клиент Sheets при первом обращении."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = _SheetsClient(GOOGLE_SERVICE_FILE)
+                client.start_refresher()
+                _client = client
+    return _client
+
 
 def get_service():
-    creds = Credentials.from_service_account_file(
-        GOOGLE_SERVICE_FILE,
-        scopes=SCOPES
+    return get_client().spreadsheets
+
+
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+# Приоритет запросов текущего контекста; sheets_async.run копирует контекст
+# в поток пула, так что значение доходит до планировщика.
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "sheets_priority", default=PRIORITY_USER
+)
+
+
+@contextmanager
+def background_priority():
+    """Запросы внутри блока уступают квоту пользовательским (синхронизации, прогрев кэшей)."""
+    token = _priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def in_background() -> bool:
+    """Идут ли запросы текущего контекста с фоновым приоритетом."""
+    return _priority.get() == PRIORITY_BACKGROUND
+
+
+class _TokenBucket:
+    """
+    Квота «N запросов в минуту». Ожидающие потоки получают токены в порядке
+    (приоритет, очередь), поэтому фоновые запросы пропускают пользовательские вперёд.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority: int) -> float:
+        """Забрать токен; возвращает, сколько секунд пришлось ждать."""
+        start = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            while True:
+                self._refill()
+                if self._waiters[0] == ticket and self.tokens >= 1:
+                    heapq.heappop(self._waiters)
+                    self.tokens -= 1
+                    self._cond.notify_all()
+                    return time.monotonic() - start
+                timeout = (1 - self.tokens) / self.rate if self.tokens < 1 else None
+                self._cond.wait(timeout)
+
+    def drain(self):
+        """После 429 квота явно исчерпана — не отдаём накопленные токены."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class _RequestScheduler:
+    """
+    Единая точка выполнения запросов к Sheets: квоты на чтение и запись,
+    приоритеты и повторы 429/5xx с экспоненциальной паузой и джиттером.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, read_quota: int, write_quota: int):
+        self._buckets = {
+            "read": _TokenBucket(read_quota),
+            "write": _TokenBucket(write_quota),
+        }
+        self._lock = threading.Lock()
+        self._stats = {
+            kind: {
+                "requests": 0,
+                "retries": 0,
+                "failed": 0,
+                "quota_wait": 0.0,
+                "max_quota_wait": 0.0,
+                "backoff_wait": 0.0,
+            }
+            for kind in self._buckets
+        }
+
+    @staticmethod
+    def _kind(request) -> str:
+        return "read" if request.method == "GET" else "write"
+
+    def _retryable(self, request, status: int) -> bool:
+        if status not in self.RETRY_STATUSES:
+            return False
+        # append неидемпотентен: после 5xx строки могли записаться, повтор их задвоит
+        return status == 429 or ":append" not in request.uri
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(SHEETS_BACKOFF_MAX, SHEETS_BACKOFF_BASE * 2 ** attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def execute(self, request):
+        kind = self._kind(request)
+        bucket = self._buckets[kind]
+        priority = _priority.get()
+        attempt = 0
+        while True:
+            waited = bucket.acquire(priority)
+            with self._lock:
+                stats = self._stats[kind]
+                stats["requests"] += 1
+                stats["quota_wait"] += waited
+                stats["max_quota_wait"] = max(stats["max_quota_wait"], waited)
+            try:
+                return get_client().execute(request)
+            except HttpError as e:
+                status = e.resp.status
+                if attempt >= SHEETS_MAX_RETRIES or not self._retryable(request, status):
+                    with self._lock:
+                        self._stats[kind]["failed"] += 1
+                    raise
+                if status == 429:
+                    bucket.drain()
+                delay = self._backoff(attempt)
+                attempt += 1
+                with self._lock:
+                    self._stats[kind]["retries"] += 1
+                    self._stats[kind]["backoff_wait"] += delay
+                print(f"[sheets] HTTP {status}, повтор {attempt} через {delay:.1f} с")
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
+
+
+_scheduler = _RequestScheduler(SHEETS_READ_QUOTA, SHEETS_WRITE_QUOTA)
+
+
+def _execute(request):
+    return _scheduler.execute(request)
+
+
+def scheduler_stats() -> dict:
+    return _scheduler.stats()
+
+def column_letter(index: int) -> str:
+    """Буква колонки в нотации A1 по индексу с нуля: 0 → A, 25 → Z, 26 → AA."""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _updated_first_row(response: dict) -> int | None:
+    """Номер первой строки из ответа values.append (updates.updatedRange)."""
+    updated_range = response.get("updates", {}).get("updatedRange", "")
+    cell = updated_range.rsplit("!", 1)[-1].split(":", 1)[0]
+    digits = "".join(ch for ch in cell if ch.isdigit())
+    return int(digits) if digits else None
+
+
+class _RequestRowIndex:
+    """
+    Индекс строк листа заявок:
+      message_id (последняя колонка) → (номер строки, индекс колонки статуса)
+      request_id (колонка J)         → номер строки
+
+    Заполняется при записи заявки через append_row и лениво
+    перестраивается чтением листа, если нужного id в нём нет, — не чаще
+    раза в ROW_INDEX_REBUILD_INTERVAL секунд, чтобы нажатия по старым
+    заявкам без строки не скачивали лист каждый раз.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.rebuilt_at = float("-inf")
+        self.by_message: dict[str, tuple[int, int]] = {}
+        self.by_request: dict[str, int] = {}
+
+    def add(self, row_number: int, row: list):
+        # последняя колонка хранит message_id, предпоследняя - статус
+        if len(row) >= 2 and str(row[-1]).strip():
+            self.by_message[str(row[-1])] = (row_number, len(row) - 2)
+        if len(row) > 9 and str(row[9]).strip():
+            self.by_request[str(row[9])] = row_number
+
+    def rebuild(self, rows):
+        """Перестроить по парам (номер строки, значения)."""
+        self.by_message.clear()
+        self.by_request.clear()
+        for row_number, row in rows:
+            self.add(row_number, row)
+        self.loaded = True
+
+
+_row_indexes: dict[str, _RequestRowIndex] = {}
+_row_index_lock = threading.Lock()
+
+
+# Подписчики на записи бота в таблицу (например, локальное зеркало заявок):
+# func(event, sheet_name, row_number, payload), где event — "append"
+# (payload — дописанные строки, row_number — первая из них) или "status"
+# (payload — новый статус строки row_number).
+_write_listeners: list = []
+
+
+def add_write_listener(func):
+    _write_listeners.append(func)
+
+
+def _notify_write(event: str, sheet_name: str, row_number: int | None, payload):
+    for func in _write_listeners:
+        try:
+            func(event, sheet_name, row_number, payload)
+        except Exception as e:
+            print(f"[sheets_write_listener] ERROR: {e}")
+
+
+def _index_appended_rows(sheet_name: str, first_row: int | None, rows: list):
+    with _row_index_lock:
+        index = _row_indexes.get(sheet_name)
+        # непостроенный индекс всё равно будет прочитан целиком при первом поиске
+        if index is None or not index.loaded or first_row is None:
+            return
+        for offset, row in enumerate(rows):
+            index.add(first_row + offset, row)
+
+
+def _find_in_row_index(sheet_name: str, lookup, rebuild: bool = True):
+    with _row_index_lock:
+        index = _row_indexes.setdefault(sheet_name, _RequestRowIndex())
+        found = lookup(index) if index.loaded else None
+        if found is not None or not rebuild:
+            return found
+        previous = index.rebuilt_at
+        if time.monotonic() - previous < ROW_INDEX_REBUILD_INTERVAL:
+            return None
+        # остальные промахи в этом окне лист не перечитывают
+        index.rebuilt_at = time.monotonic()
+
+    # промах — перестраиваем индекс по листу (новые строки, запись вне бота)
+    try:
+        rows = list(iter_sheet_rows(sheet_name))
+    except Exception:
+        with _row_index_lock:
+            index.rebuilt_at = previous
+        raise
+    with _row_index_lock:
+        index.rebuild(rows)
+        return lookup(index)
+
+
+def find_request_row(
+    message_id, sheet_name: str = "Заявки", rebuild: bool = True
+) -> tuple[int, int] | None:
+    """
+    (номер строки, индекс колонки статуса) заявки по message_id.
+    С rebuild=False — только по уже загруженному индексу, без чтения листа.
+    """
+    return _find_in_row_index(
+        sheet_name, lambda index: index.by_message.get(str(message_id)), rebuild
+    )
+
+
+def find_row_by_request_id(
+    request_id, sheet_name: str = "Заявки", rebuild: bool = True
+) -> int | None:
+    """Номер строки заявки по request_id (колонка J)."""
+    return _find_in_row_index(
+        sheet_name, lambda index: index.by_request.get(str(request_id)), rebuild
     )
-    service = build("sheets", "v4", credentials=creds)
-    return service.spreadsheets()
 
-def append_row(values: list, sheet_name="Заявки"):
+
+def append_rows(
+    rows: list[list],
+    sheet_name="Заявки",
+    value_input_option: str = "USER_ENTERED",
+) -> int | None:
+    """Дописывает строки в лист одним запросом и возвращает номер первой из них."""
     service = get_service()
-    body = {"values": [values]}
-    service.values().append(
+    body = {"values": rows}
+    response = _execute(service.values().append(
         spreadsheetId=TARGET_SPREADSHEET_ID,
         range=f"{sheet_name}!A1",
-        valueInputOption="USER_ENTERED",
-        body=body
-    ).execute()
+        valueInputOption=value_input_option,
+        body=body,
+        fields="updates.updatedRange",
+    ))
+    first_row = _updated_first_row(response)
+    _index_appended_rows(sheet_name, first_row, rows)
+    _notify_write("append", sheet_name, first_row, rows)
+    return first_row
+
+
+def append_row(values: list, sheet_name="Заявки") -> int | None:
+    """Дописывает строку в лист и возвращает её номер."""
+    return append_rows([values], sheet_name)
 
 def update_cell(row: int, column_letter: str, value, sheet_name="Заявки"):
     service = get_service()
-    service.values().update(
+    _execute(service.values().update(
         spreadsheetId=TARGET_SPREADSHEET_ID,
         range=f"{sheet_name}!{column_letter}{row}",
         valueInputOption="RAW",
-        body={"values": [[value]]}
-    ).execute()
+        body={"values": [[value]]},
+        fields="updatedRange",
+    ))
+
+# Известная ширина листов (число колонок): читаем только нужные колонки.
+# Для остальных листов (SKU, Заявки) ширина зависит от числа линеек,
+# поэтому запрашиваются целые строки без ограничения по колонкам.
+SHEET_WIDTHS = {
+    "Сотрудники": 1,
+    "Чаты": 2,
+    "Заведения": 4,
+    "Ответы на форму (1)": 5,
+}
+
+
+def sheet_range(sheet_name: str, start_row: int = 1, end_row: int | None = None) -> str:
+    """
+    Диапазон A1 для чтения листа без жёстких A1:Z9999:
+      - известная ширина: 'Лист'!A<start>:<col><end>
+      - неизвестная: строки целиком 'Лист'!<start>:<end> (весь лист — просто 'Лист')
+    Без end_row диапазон открыт вниз до конца данных.
+    """
+    quoted = "'" + sheet_name.replace("'", "''") + "'"
+    width = SHEET_WIDTHS.get(sheet_name)
+    end = str(end_row) if end_row is not None else ""
+
+    if width:
+        return f"{quoted}!A{start_row}:{column_letter(width - 1)}{end}"
+    if start_row == 1 and end_row is None:
+        return quoted
+    if end_row is None:
+        return f"{quoted}!A{start_row}:ZZZ"
+    return f"{quoted}!{start_row}:{end}"
+
 
 def read_sheet(sheet_name: str, source: bool = False):
     service = get_service()
     spreadsheetId = SOURCE_SPREADSHEET_ID if source else TARGET_SPREADSHEET_ID
-    result = service.values().get(
+    result = _execute(service.values().get(
         spreadsheetId=spreadsheetId,
-        range=f"{sheet_name}!A1:Z9999"
-    ).execute()
+        range=sheet_range(sheet_name),
+        fields="values",
+    ))
     return result.get("values", [])
 
 
-# New function: get_venues_by_ambassador
-def get_venues_by_ambassador(ambassador_username: str, sheet_name: str = "Заведения"):
+def batch_get(sheet_names: list[str], source: bool = False) -> dict[str, list]:
     """
-    Возвращает список заведений, закреплённых за амбассадором, из РАБОЧЕЙ таблицы.
-
-    Ожидаемый формат строки на листе `sheet_name`:
-    0 - username амбассадора (@nickname)
-    1 - название заведения (как показываем амбассадору)
-    2 - адрес (опционально)
-    3 - нормализованный ключ (опционально)
+    Несколько листов одним запросом values.batchGet.
+    Возвращает {имя листа: строки}, как если бы каждый прочитали read_sheet.
     """
-    rows = read_sheet(sheet_name, source=False)
-    venues: list[str] = []
-
-    if not rows:
-        return venues
-
-    # пропускаем заголовок
-    for row in rows[1:]:
-        if len(row) < 2:
-            continue
-        if str(row[0]).strip().lower() == ambassador_username.strip().lower():
-            venues.append(row[1])
-
-    return venues
-
-def get_venue_full(ambassador_username: str, venue_name: str, sheet_name: str = "Заведения"):
+    if not sheet_names:
+        return {}
+    spreadsheetId = SOURCE_SPREADSHEET_ID if source else TARGET_SPREADSHEET_ID
+    result = _execute(get_service().values().batchGet(
+        spreadsheetId=spreadsheetId,
+        ranges=[sheet_range(name) for name in sheet_names],
+        fields="valueRanges(values)",
+    ))
+    # valueRanges идут в порядке запрошенных диапазонов
+    value_ranges = result.get("valueRanges", [])
+    return {
+        name: value_range.get("values", [])
+        for name, value_range in zip(sheet_names, value_ranges)
+    }
+
+
+def get_row_count(sheet_name: str, source: bool = False) -> int:
+    """Число строк сетки листа (из метаданных, без выгрузки значений)."""
+    spreadsheetId = SOURCE_SPREADSHEET_ID if source else TARGET_SPREADSHEET_ID
+    result = _execute(get_service().get(
+        spreadsheetId=spreadsheetId,
+        fields="sheets.properties(title,gridProperties.rowCount)",
+    ))
+    for sheet in result.get("sheets", []):
+        props = sheet.get("properties", {})
+        if props.get("title") == sheet_name:
+            return props.get("gridProperties", {}).get("rowCount", 0)
+    return 0
+
+
+def iter_sheet_rows(
+    sheet_name: str,
+    source: bool = False,
+    start_row: int = 1,
+    page_size: int = SHEET_PAGE_SIZE,
+):
     """
-    Возвращает полное описание заведения для амбассадора:
-    (venue_name, address, normalized_key)
-
-    Ищет строго по амбассадору и названию заведения.
+    Постранично читает большой лист, начиная со строки `start_row`.
+    Отдаёт пары (номер строки, значения); пустые строки внутри данных — [].
+    Граница берётся из размера сетки листа, поэтому нет отсечки по 9999 строк.
     """
-    rows = read_sheet(sheet_name, source=False)
-
-    if not rows:
-        return None
-
-    # пропускаем заголовок
-    for row in rows[1:]:
-        if len(row) < 4:
+    service = get_service()
+    spreadsheetId = SOURCE_SPREADSHEET_ID if source else TARGET_SPREADSHEET_ID
+    row_count = get_row_count(sheet_name, source)
+
+    page_start = start_row
+    while page_start <= row_count:
+        page_end = min(page_start + page_size - 1, row_count)
+        result = _execute(service.values().get(
+            spreadsheetId=spreadsheetId,
+            range=sheet_range(sheet_name, page_start, page_end),
+            fields="values",
+        ))
+        for offset, row in enumerate(result.get("values", [])):
+            yield page_start + offset, row
+        page_start = page_end + 1
+
+
+def _venues_from_form_rows(rows: list[list]) -> list[tuple[tuple[str, str], tuple[str, str, str, str]]]:
+    """
+    Разбирает строки формы: B — амбассадор, D — заведение, E — адрес.
+    Возвращает пары (ключ дедупликации, запись для листа заведений);
+    ключи нормализуются пачкой по всей колонке.
+    """
+    picked = []
+    for row in rows:
+        if len(row) <= 4:
             continue
 
-        amb = str(row[0]).strip().lower()
-        name = str(row[1]).strip()
+        ambassador = str(row[1]).strip()
+        venue_name = str(row[3]).strip()
+        address = str(row[4]).strip()
 
-        if amb == ambassador_username.strip().lower() and name == venue_name.strip():
-            address = str(row[2]).strip() if len(row) > 2 else ""
-            norm_key = str(row[3]).strip() if len(row) > 3 else ""
-            return {
-                "name": name,
-                "address": address,
-                "normalized_key": norm_key,
-            }
+        if not ambassador or not venue_name:
+            continue
+        picked.append((ambassador, venue_name, address))
 
-    return None
+    keys = normalize_venue_keys([p[1] for p in picked], [p[2] for p in picked])
+    return [
+        ((ambassador.lower(), norm_key), (ambassador, venue_name, address, norm_key))
+        for (ambassador, venue_name, address), norm_key in zip(picked, keys)
+    ]
 
 
 def build_venues_from_source(
@@ -157,60 +606,139 @@ def build_venues_from_source(
     C - address
     D - normalized_key
     """
-    rows = read_sheet(source_sheet_name, source=True)
-    if not rows:
-        return 0
+    # весь цикл «очистить — переписать» под блокировкой синхронизации: иначе
+    # фоновый sync_new_venues может дописать строки между очисткой и записью
+    with _venue_sync_lock:
+        venues_map: dict[tuple[str, str], tuple[str, str, str, str]] = {}
 
-    # пропускаем первую строку как заголовок
-    header_skipped = False
-    venues_map: dict[tuple[str, str], tuple[str, str, str, str]] = {}
+        # со второй строки: первая — заголовок
+        numbered = list(iter_sheet_rows(source_sheet_name, source=True, start_row=2))
+        last_row = numbered[-1][0] if numbered else 1
 
-    for row in rows:
-        if not header_skipped:
-            header_skipped = True
-            continue
+        for map_key, record in _venues_from_form_rows([row for _, row in numbered]):
+            # храним только одну запись на ключ
+            if map_key in venues_map:
+                continue
 
-        if len(row) <= 4:
-            continue
+            venues_map[map_key] = record
 
-        ambassador = str(row[1]).strip()
-        venue_name = str(row[3]).strip()
-        address = str(row[4]).strip()
+        if not venues_map:
+            return 0
 
-        if not ambassador or not venue_name:
-            continue
+        # готовим данные для записи
+        data = [["ambassador_username", "venue_name", "address", "normalized_key"]]
+        for _, record in venues_map.items():
+            data.append(list(record))
 
-        norm_key = _normalize_venue_name(venue_name, address)
-        map_key = (ambassador.lower(), norm_key)
+        service = get_service()
 
-        # храним только одну запись на ключ
-        if map_key in venues_map:
-            continue
+        # очищаем целевой лист
+        _execute(service.values().clear(
+            spreadsheetId=TARGET_SPREADSHEET_ID,
+            range=sheet_range(target_sheet_name),
+            fields="clearedRange",
+        ))
 
-        venues_map[map_key] = (ambassador, venue_name, address, norm_key)
+        # пишем новые данные
+        _execute(service.values().update(
+            spreadsheetId=TARGET_SPREADSHEET_ID,
+            range=f"{target_sheet_name}!A1",
+            valueInputOption="RAW",
+            body={"values": data},
+            fields="updatedRange",
+        ))
 
-    # готовим данные для записи
-    data = [["ambassador_username", "venue_name", "address", "normalized_key"]]
-    for _, record in venues_map.items():
-        data.append(list(record))
+        # дальше можно синхронизироваться инкрементально от этой строки формы
+        _venue_sync_keys[target_sheet_name] = _VenueKeys(set(venues_map), has_header=True)
+        _save_venue_sync_state({"watermark": last_row})
 
-    service = get_service()
+        return len(data) - 1
 
-    # очищаем целевой лист
-    service.values().clear(
-        spreadsheetId=TARGET_SPREADSHEET_ID,
-        range=f"{target_sheet_name}!A1:Z9999",
-    ).execute()
 
-    # пишем новые данные
-    service.values().update(
-        spreadsheetId=TARGET_SPREADSHEET_ID,
-        range=f"{target_sheet_name}!A1",
-        valueInputOption="RAW",
-        body={"values": data},
-    ).execute()
+class _VenueKeys:
+    """Ключи (амбассадор, нормализованный ключ) уже записанных заведений листа."""
+
+    def __init__(self, keys: set[tuple[str, str]], has_header: bool):
+        self.keys = keys
+        self.has_header = has_header
+
+
+_venue_sync_lock = threading.Lock()
+_venue_sync_keys: dict[str, _VenueKeys] = {}
+
+
+def _load_venue_sync_state() -> dict:
+    if not os.path.exists(VENUES_SYNC_STATE):
+        return {}
+    with open(VENUES_SYNC_STATE, encoding="utf-8") as f:
+        return json.load(f)
 
-    return len(data) - 1
+
+def _save_venue_sync_state(state: dict):
+    tmp_path = VENUES_SYNC_STATE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, VENUES_SYNC_STATE)
+
+
+def _known_venue_keys(target_sheet_name: str) -> _VenueKeys:
+    """Ключи заведений целевого листа: лист читается один раз за процесс."""
+    known = _venue_sync_keys.get(target_sheet_name)
+    if known is None:
+        rows = read_sheet(target_sheet_name)
+        keys = set()
+        for row in rows[1:]:
+            if len(row) >= 2:
+                address = row[2] if len(row) > 2 else ""
+                keys.add((str(row[0]).strip().lower(), _normalize_venue_name(row[1], address)))
+        known = _VenueKeys(keys, has_header=bool(rows))
+        _venue_sync_keys[target_sheet_name] = known
+    return known
+
+
+def sync_new_venues(
+    source_sheet_name: str = "Ответы на форму (1)",
+    target_sheet_name: str = "Заведения",
+) -> list[list[str]]:
+    """
+    Инкрементальная синхронизация заведений: читает только ответы формы
+    после сохранённой отметки (последней обработанной строки), отбрасывает
+    уже известные заведения и дописывает новые одной операцией append.
+
+    Возвращает дописанные строки в формате целевого листа.
+    Если отметки ещё нет, обрабатывается вся форма.
+    """
+    with _venue_sync_lock:
+        state = _load_venue_sync_state()
+        watermark = int(state.get("watermark", 1))
+        known = _known_venue_keys(target_sheet_name)
+
+        numbered = list(iter_sheet_rows(
+            source_sheet_name, source=True, start_row=watermark + 1
+        ))
+        last_row = numbered[-1][0] if numbered else watermark
+
+        new_keys: set[tuple[str, str]] = set()
+        new_rows: list[list[str]] = []
+        for map_key, record in _venues_from_form_rows([row for _, row in numbered]):
+            if map_key in known.keys or map_key in new_keys:
+                continue
+            new_keys.add(map_key)
+            new_rows.append(list(record))
+
+        if new_rows:
+            to_write = new_rows
+            if not known.has_header:
+                # пустой целевой лист — сначала заголовок
+                to_write = [["ambassador_username", "venue_name", "address", "normalized_key"]] + new_rows
+            append_rows(to_write, target_sheet_name, value_input_option="RAW")
+            known.has_header = True
+            known.keys.update(new_keys)
+
+        if last_row != watermark:
+            _save_venue_sync_state({"watermark": last_row})
+
+        return new_rows
 
 def get_all_requests(sheet_name: str = "Заявки"):
     """Возвращает все строки из указанного листа, кроме строки заголовков.
@@ -227,13 +755,8 @@ def get_all_requests(sheet_name: str = "Заявки"):
       N-2 - статус ("" / "YES" / "NO")
       N-1 - message_id
     """
-    values = read_sheet(sheet_name)
-
-    if not values:
-        return []
-
     cleaned = []
-    for row in values:
+    for _, row in iter_sheet_rows(sheet_name):
         # пропускаем возможную строку заголовков
         if row and str(row[0]).strip().lower() in ("дата", "date"):
             continue
@@ -241,91 +764,93 @@ def get_all_requests(sheet_name: str = "Заявки"):
 
     return cleaned
 
-def update_status(message_id, status, sheet_name: str = "Заявки"):
-    rows = read_sheet(sheet_name)
-    service = get_service()
+class _ChatLinks:
+    """Кэш листа чатов: нормализованный username → (номер строки, chat_id)."""
 
-    for idx, row in enumerate(rows, start=1):
-        if not row:
-            continue
+    def __init__(self):
+        self.loaded_at: float | None = None
+        self.has_header = False
+        self.rows: dict[str, tuple[int, str]] = {}
 
-        last_index = len(row) - 1
-        msg_index = last_index
+    def load(self, rows: list):
+        self.rows.clear()
+        self.has_header = bool(rows)
+        # пропускаем заголовок
+        for row_number, row in enumerate(rows[1:], start=2):
+            if len(row) >= 1 and str(row[0]).strip():
+                chat_id = str(row[1]) if len(row) >= 2 else ""
+                self.rows[normalize_username(row[0])] = (row_number, chat_id)
+        self.loaded_at = time.monotonic()
 
-        # последняя колонка хранит message_id, предпоследняя - статус
-        if msg_index < 1:
-            continue
 
-        if str(row[msg_index]) == str(message_id):
-            status_index = last_index - 1
+_chat_links: dict[str, _ChatLinks] = {}
+_chat_links_lock = threading.RLock()
 
-            # вычисляем букву колонки по индексу (поддержка до Z)
-            col_letter = chr(ord("A") + status_index)
-            service.values().update(
-                spreadsheetId=TARGET_SPREADSHEET_ID,
-                range=f"{sheet_name}!{col_letter}{idx}",
-                valueInputOption="RAW",
-                body={"values": [[status]]}
-            ).execute()
-            break
 
-def save_chat_link(ambassador_username: str, chat_id: int, sheet_name: str = "Чаты"):
-    """
-    Сохраняет связку амбассадор → chat_id.
-    Если амбассадор уже есть — перезаписываем chat_id.
-    """
-    service = get_service()
+def _chat_links_stale(links: _ChatLinks) -> bool:
+    return links.loaded_at is None or time.monotonic() - links.loaded_at >= CHAT_LINKS_TTL
 
-    # читаем текущий лист
-    rows = read_sheet(sheet_name)
-    updated = False
-    new_rows = []
 
-    if not rows:
-        rows = [["ambassador_username", "chat_id"]]
+def _get_chat_links(sheet_name: str) -> _ChatLinks:
+    """Кэш связок для листа; перечитывается раз в CHAT_LINKS_TTL секунд."""
+    with _chat_links_lock:
+        links = _chat_links.setdefault(sheet_name, _ChatLinks())
+        if _chat_links_stale(links):
+            links.load(read_sheet(sheet_name))
+        return links
 
-    # пробегаем строки, ищем амбассадора
-    for row in rows:
-        if len(row) >= 1 and row[0].strip().lower() == ambassador_username.strip().lower():
-            new_rows.append([ambassador_username, str(chat_id)])
-            updated = True
-        else:
-            new_rows.append(row)
-
-    # если не найден — добавляем
-    if not updated:
-        new_rows.append([ambassador_username, str(chat_id)])
-
-    # очищаем лист
-    service.values().clear(
-        spreadsheetId=TARGET_SPREADSHEET_ID,
-        range=f"{sheet_name}!A1:Z9999",
-    ).execute()
 
-    # записываем заново
-    service.values().update(
-        spreadsheetId=TARGET_SPREADSHEET_ID,
-        range=f"{sheet_name}!A1",
-        valueInputOption="RAW",
-        body={"values": new_rows},
-    ).execute()
+def chat_links_expired(sheet_name: str = "Чаты") -> bool:
+    links = _chat_links.get(sheet_name)
+    return links is None or _chat_links_stale(links)
 
 
-def get_chat_link(ambassador_username: str, sheet_name: str = "Чаты") -> str | None:
+def prime_chat_links(rows: list, sheet_name: str = "Чаты"):
+    """Положить в кэш связок уже прочитанный лист (например, из batch_get)."""
+    with _chat_links_lock:
+        _chat_links.setdefault(sheet_name, _ChatLinks()).load(rows)
+
+
+def save_chat_link(ambassador_username: str, chat_id: int, sheet_name: str = "Чаты"):
     """
-    Возвращает chat_id, привязанный к амбассадору.
+    Сохраняет связку амбассадор → chat_id.
+    Если амбассадор уже есть — перезаписываем chat_id одной ячейкой,
+    иначе дописываем одну строку. Лист никогда не очищается.
     """
-    rows = read_sheet(sheet_name)
-
-    if not rows:
-        return None
+    key = normalize_username(ambassador_username)
+
+    # блокировка на всю операцию: два одновременных /bind не допишут дубль
+    with _chat_links_lock:
+        links = _get_chat_links(sheet_name)
+        existing = links.rows.get(key)
+
+        if existing is not None:
+            row_number, _ = existing
+            update_cell(row_number, "B", str(chat_id), sheet_name)
+            links.rows[key] = (row_number, str(chat_id))
+            return
+
+        new_rows = [[ambassador_username, str(chat_id)]]
+        if not links.has_header:
+            new_rows.insert(0, ["ambassador_username", "chat_id"])
+        # RAW, как и update_cell: иначе -100… станет числом в формате ячейки
+        first_row = append_rows(new_rows, sheet_name, value_input_option="RAW")
+        links.has_header = True
+        if first_row is None:
+            # номер строки неизвестен — перечитаем лист при следующем обращении
+            links.loaded_at = None
+            return
+        links.rows[key] = (first_row + len(new_rows) - 1, str(chat_id))
 
-    # пропускаем заголовок
-    for row in rows[1:]:
-        if len(row) >= 2 and row[0].strip().lower() == ambassador_username.strip().lower():
-            return row[1]
 
-    return None
+def get_chat_link(ambassador_username: str, sheet_name: str = "Чаты") -> str | None:
+    """
+    Возвращает chat_id, привязанный к амбассадору (из кэша листа).
+    """
+    found = _get_chat_links(sheet_name).rows.get(normalize_username(ambassador_username))
+    if found is None or not found[1]:
+        return None
+    return found[1]
 
 def write_chat_link(ambassador_username: str, chat_id: int, sheet_name: str = "Чаты"):
     """
@@ -333,26 +858,370 @@ def write_chat_link(ambassador_username: str, chat_id: int, sheet_name: str = "
     """
     return save_chat_link(ambassador_username, chat_id, sheet_name)
 
-def is_employee(username: str, sheet_name: str = "Сотрудники") -> bool:
+def _is_transient(error: Exception) -> bool:
+    """Ошибка, которая пройдёт сама (квота, сбой Google, сеть): повторять без счёта попыток."""
+    if isinstance(error, HttpError):
+        return error.resp.status in _RequestScheduler.RETRY_STATUSES
+    return isinstance(error, (OSError, httplib2.HttpLib2Error))
+
+
+def _write_statuses(updates: list[dict]):
+    """Статусы одним values.batchUpdate; updates — {"sheet", "row", "value", "range"}."""
+    _execute(get_service().values().batchUpdate(
+        spreadsheetId=TARGET_SPREADSHEET_ID,
+        body={
+            "valueInputOption": "RAW",
+            "data": [{"range": u["range"], "values": [[u["value"]]]} for u in updates],
+        },
+        fields="totalUpdatedCells",
+    ))
+    for u in updates:
+        _notify_write("status", u["sheet"], u["row"], u["value"])
+
+
+class _WriteBehindQueue:
     """
-    Проверяет, есть ли username в списке сотрудников.
-    Лист должен иметь формат:
-        A: username (например: @viktor)
+    Очередь отложенной записи в таблицу.
+
+    Новые строки и смены статусов копятся в памяти и раз в `flush_interval`
+    секунд уходят пачкой: один values.append на лист и один
+    values.batchUpdate на все статусы. Каждая операция сразу пишется в
+    журнал (JSON Lines), поэтому после перезапуска недописанное
+    восстанавливается и отправляется.
+
+    Квота, сбои Google и сеть повторяются без ограничений. Операция с
+    постоянной ошибкой (например, 400 на строку) отделяется от пачки и после
+    `max_attempts` сбросов уходит в `dead_letter_path`, не задерживая остальные.
+    Статус, для которого строка не нашлась, ждёт следующего перечитывания
+    индекса строк и считается так же: после `max_attempts` — в dead letter.
     """
-    rows = read_sheet(sheet_name)
 
-    if not rows:
-        return False
+    def __init__(
+        self,
+        journal_path: str,
+        flush_interval: float,
+        dead_letter_path: str = WRITE_QUEUE_DEAD_LETTER,
+        max_attempts: int = WRITE_QUEUE_MAX_ATTEMPTS,
+    ):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.dead_letter_path = dead_letter_path
+        self.max_attempts = max_attempts
+        self.dead_letters = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._ops: list[dict] = []
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_latency: float | None = None
+        self.max_flush_latency = 0.0
+        self._load_journal()
+
+    def _load_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._ops.append(json.loads(line))
+                except ValueError:
+                    # недописанная при падении строка
+                    print(f"[write_queue] skip broken journal line: {line[:80]}")
+
+    def _write_journal(self, ops: list[dict], mode: str):
+        with open(self.journal_path, mode, encoding="utf-8") as f:
+            for op in ops:
+                f.write(json.dumps(op, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _enqueue(self, op: dict):
+        with self._lock:
+            self._write_journal([op], "a")
+            self._ops.append(op)
+
+    def enqueue_append(self, values: list, sheet_name: str = "Заявки"):
+        self._enqueue({"op": "append", "sheet": sheet_name, "values": values})
+
+    def enqueue_status(self, message_id, status, sheet_name: str = "Заявки"):
+        self._enqueue(
+            {"op": "status", "sheet": sheet_name, "key": str(message_id), "value": status}
+        )
+
+    def enqueue_statuses(self, statuses: list[tuple], sheet_name: str = "Заявки"):
+        """Пачка смен статусов (message_id, статус) одной записью в журнал."""
+        ops = [
+            {"op": "status", "sheet": sheet_name, "key": str(message_id), "value": status}
+            for message_id, status in statuses
+        ]
+        if not ops:
+            return
+        with self._lock:
+            self._write_journal(ops, "a")
+            self._ops.extend(ops)
+        self._wakeup.set()
+
+    def enqueue_request_status(
+        self, request_id, status, sheet_name: str = "Заявки", column: str = "I"
+    ):
+        """Статус строки, найденной по request_id (колонка J), в колонку `column`."""
+        self._enqueue({
+            "op": "status", "sheet": sheet_name, "key": str(request_id), "value": status,
+            "by": "request", "column": column,
+        })
+
+    def has_pending_append(self, message_id, sheet_name: str = "Заявки") -> bool:
+        key = str(message_id)
+        with self._lock:
+            return any(
+                op["op"] == "append" and op["sheet"] == sheet_name
+                and op["values"] and str(op["values"][-1]) == key
+                for op in self._ops
+            )
+
+    @property
+    def depth(self) -> int:
+        return len(self._ops)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency,
+            "dead_letters": self.dead_letters,
+        }
+
+    def _fail(self, op: dict, error: Exception, retry: list[dict]):
+        """Временная ошибка — повторяем без счёта; иначе считаем попытки и откладываем в dead letter."""
+        if _is_transient(error):
+            retry.append(op)
+            return
+        attempts = op.get("attempts", 0) + 1
+        if attempts < self.max_attempts:
+            retry.append({**op, "attempts": attempts})
+            return
+        print(f"[write_queue] giving up after {attempts} attempts, see {self.dead_letter_path}: {error}")
+        self.dead_letters += 1
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**op, "attempts": attempts, "error": str(error)}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _send_each(self, items: list, send, retry: list[dict]):
+        """
+        Отправить пачку [(op, payload)] одним вызовом `send(payloads)`; при
+        постоянной ошибке — по одной, чтобы плохая операция не держала остальные.
+        """
+        try:
+            send([payload for _, payload in items])
+            return
+        except Exception as e:
+            print(f"[write_queue] ERROR: {e}")
+            if _is_transient(e) or len(items) == 1:
+                for op, _ in items:
+                    self._fail(op, e, retry)
+                return
+        for op, payload in items:
+            try:
+                send([payload])
+            except Exception as e:
+                self._fail(op, e, retry)
+
+    def _apply(self, ops: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Отправляет пачку операций; возвращает те, что нужно повторить, и
+        статусы, отложенные до следующего перечитывания индекса строк.
+        """
+        appends: dict[str, list[tuple[dict, list]]] = {}
+        pending_rows: dict[tuple[str, str], dict] = {}
+        statuses: list[dict] = []
+
+        for op in ops:
+            if op["op"] == "append":
+                # копия операции: статус, вписанный в строку, должен пережить повтор
+                op = {**op, "values": list(op["values"])}
+                appends.setdefault(op["sheet"], []).append((op, op["values"]))
+                if len(op["values"]) >= 2:
+                    pending_rows[(op["sheet"], str(op["values"][-1]))] = op
+            else:
+                statuses.append(op)
+
+        # несколько нажатий по одной заявке за окно сброса — пишем только последнее
+        latest: dict[tuple, dict] = {}
+        for op in statuses:
+            target = (op["sheet"], op.get("by", "message"), op["key"])
+            latest.pop(target, None)
+            latest[target] = op
+        statuses = list(latest.values())
+
+        # статус для ещё не записанной строки просто правим в самой строке
+        remaining_statuses = []
+        for op in statuses:
+            append_op = (
+                pending_rows.get((op["sheet"], op["key"]))
+                if op.get("by", "message") == "message" else None
+            )
+            if append_op is not None:
+                append_op["values"][-2] = op["value"]
+            else:
+                remaining_statuses.append(op)
+
+        retry: list[dict] = []
+        waiting: list[dict] = []
+        for sheet_name, items in appends.items():
+            self._send_each(items, functools.partial(append_rows, sheet_name=sheet_name), retry)
+
+        # статусы пишем и при ошибке дописывания: они не зависят от неудачных строк
+        items = []
+        for op in remaining_statuses:
+            if op.get("retry_after", 0) > time.time():
+                # индекс строк раньше не перечитается — искать пока бесполезно
+                waiting.append(op)
+                continue
+            try:
+                if op.get("by") == "request":
+                    row_number = find_row_by_request_id(op["key"], op["sheet"])
+                    column = op["column"]
+                else:
+                    found = find_request_row(op["key"], op["sheet"])
+                    row_number, column = (
+                        (found[0], column_letter(found[1])) if found else (None, None)
+                    )
+            except Exception as e:
+                print(f"[write_queue] ERROR resolving {op['key']}: {e}")
+                self._fail(op, e, retry)
+                continue
+            if row_number is None:
+                print(f"[write_queue] request not found: {op['key']}")
+                self._fail(
+                    {**op, "retry_after": time.time() + ROW_INDEX_REBUILD_INTERVAL},
+                    LookupError(f"request not found: {op['key']}"),
+                    retry,
+                )
+                continue
+            items.append((op, {
+                "sheet": op["sheet"],
+                "row": row_number,
+                "value": op["value"],
+                "range": f"{op['sheet']}!{column}{row_number}",
+            }))
+        if items:
+            self._send_each(items, _write_statuses, retry)
+        return retry, waiting
+
+    def _rewrite_journal(self, ops: list[dict]):
+        """Заменить журнал целиком: пишем во временный файл и подменяем атомарно."""
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for op in ops:
+                f.write(json.dumps(op, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def flush(self):
+        # один flush за раз: иначе пачки могут уйти не по порядку
+        with self._flush_lock:
+            with self._lock:
+                ops, self._ops = self._ops, []
+            if not ops:
+                return
+
+            started = time.monotonic()
+            try:
+                retry, waiting = self._apply(ops)
+            except Exception as e:
+                print(f"[write_queue] ERROR flushing: {e}")
+                retry, waiting = ops, []
+            latency = time.monotonic() - started
+
+            with self._lock:
+                self._ops = retry + waiting + self._ops
+                self._rewrite_journal(self._ops)
+
+            if retry:
+                self.failed_flushes += 1
+            else:
+                self.flushes += 1
+                self.last_flush_latency = latency
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="sheets-write-queue", daemon=True
+        )
+        self._thread.start()
+
+
+_write_queue: _WriteBehindQueue | None = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> _WriteBehindQueue:
+    """Общая очередь записи; при первом обращении поднимает журнал и поток сброса."""
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                queue = _WriteBehindQueue(WRITE_QUEUE_JOURNAL, WRITE_QUEUE_FLUSH_INTERVAL)
+                queue.start()
+                _write_queue = queue
+    return _write_queue
+
+
+def enqueue_append(values: list, sheet_name: str = "Заявки"):
+    """Отложенная запись строки (уйдёт в таблицу со следующей пачкой)."""
+    get_write_queue().enqueue_append(values, sheet_name)
+
+
+def enqueue_status(message_id, status, sheet_name: str = "Заявки"):
+    """Отложенная смена статуса заявки по message_id."""
+    get_write_queue().enqueue_status(message_id, status, sheet_name)
+
+
+def request_exists(message_id, sheet_name: str = "Заявки", check_sheet: bool = False) -> bool:
+    """
+    Строка заявки уже в очереди записи или в загруженном индексе строк.
+    check_sheet=True при промахе дочитывает индекс по листу — это полное
+    чтение «Заявок», поэтому только для восстановления после перезапуска.
+    """
+    return (
+        get_write_queue().has_pending_append(message_id, sheet_name)
+        or find_request_row(message_id, sheet_name, rebuild=check_sheet) is not None
+    )
 
-    # пропускаем заголовок
-    for row in rows[1:]:
-        if len(row) == 0:
-            continue
 
-        if row[0].strip().lower() == username.strip().lower():
-            return True
+def enqueue_statuses(statuses: list[tuple], sheet_name: str = "Заявки"):
+    """Отложенная смена статусов пачкой: [(message_id, статус), ...]."""
+    get_write_queue().enqueue_statuses(statuses, sheet_name)
+
+
+def enqueue_request_status(request_id, status, sheet_name: str = "Заявки", column: str = "I"):
+    """Отложенная смена статуса заявки по request_id."""
+    get_write_queue().enqueue_request_status(request_id, status, sheet_name, column)
+
+
+def flush_writes():
+    get_write_queue().flush()
+
 
-    return False
+def write_queue_stats() -> dict:
+    return get_write_queue().stats()
 
 if __name__ == "__main__":
     # Утилита для ручной синхронизации заведений из живой таблицы.
@@ -0,0 +1,65 @@
+"""
+Асинхронный доступ к Google Sheets для хэндлеров aiogram.
+
+Синхронные функции из `bot.services.sheets` выполняются в отдельном
+ограниченном пуле потоков, поэтому медленный запрос одного амбассадора
+не останавливает цикл поллинга для остальных. У каждого потока пула своё
+keep-alive соединение (см. `_SheetsClient.http`), так что пул потоков
+одновременно служит пулом HTTP-соединений.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from bot.config import SHEETS_MAX_CONCURRENCY
+from bot.services import sheets
+
+_executor = ThreadPoolExecutor(
+    max_workers=SHEETS_MAX_CONCURRENCY,
+    thread_name_prefix="sheets",
+)
+
+
+async def run(func, *args, **kwargs):
+    """Выполнить синхронную функцию работы с таблицей в пуле Sheets."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_executor, call)
+
+
+async def read_sheet(sheet_name: str, source: bool = False):
+    return await run(sheets.read_sheet, sheet_name, source)
+
+
+async def batch_get(sheet_names: list[str], source: bool = False) -> dict[str, list]:
+    return await run(sheets.batch_get, sheet_names, source)
+
+
+async def enqueue_append(values: list, sheet_name="Заявки"):
+    """Поставить строку в очередь отложенной записи (без запроса к таблице)."""
+    return await run(sheets.enqueue_append, values, sheet_name)
+
+
+async def enqueue_status(message_id, status, sheet_name: str = "Заявки"):
+    """Поставить смену статуса в очередь отложенной записи."""
+    return await run(sheets.enqueue_status, message_id, status, sheet_name)
+
+
+async def enqueue_statuses(statuses: list[tuple], sheet_name: str = "Заявки"):
+    return await run(sheets.enqueue_statuses, statuses, sheet_name)
+
+
+async def enqueue_request_status(request_id, status, sheet_name: str = "Заявки", column: str = "I"):
+    return await run(sheets.enqueue_request_status, request_id, status, sheet_name, column)
+
+
+async def get_chat_link(ambassador_username: str, sheet_name: str = "Чаты") -> str | None:
+    return await run(sheets.get_chat_link, ambassador_username, sheet_name)
+
+
+async def write_chat_link(ambassador_username: str, chat_id: int, sheet_name: str = "Чаты"):
+    return await run(sheets.write_chat_link, ambassador_username, chat_id, sheet_name)
+
+
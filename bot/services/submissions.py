@@ -0,0 +1,231 @@
+"""
+Конвейер заявок: амбассадор получает ответ сразу, а уведомление
+дистрибьютору и запись строки в таблицу идут в фоне.
+
+Заявка сначала пишется в журнал (JSON Lines, fsync) и только потом
+хэндлер отвечает пользователю, так что после сбоя или перезапуска
+недоделанные заявки продолжаются с той стадии, где остановились:
+
+  new       — принята, сообщение дистрибьютору ещё не отправлено
+  notified  — сообщение отправлено, известен его message_id
+  done      — строка поставлена в очередь записи (её журнал строку не потеряет)
+
+В последнюю колонку строки пишется message_id сообщения дистрибьютора —
+по нему кнопки «Подтверждено / Не отгружено» находят строку. Ключ
+идемпотентности — chat_id:message_id сообщения амбассадора: повторная
+доставка того же апдейта не создаёт вторую заявку, а перед записью
+проверяется, что строки с этим message_id ещё нет. Остаётся окно между
+успешной отправкой в Telegram и записью стадии в журнал: при падении
+ровно в нём сообщение дистрибьютору после перезапуска уйдёт повторно.
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError, TelegramServerError
+
+from bot.config import SUBMISSIONS_JOURNAL
+from bot.keyboards.distributor import get_distributor_keyboard
+from bot.services import notifier, sheets, sheets_async
+
+# паузы между повторами стадии при временных ошибках (секунды)
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 300
+
+
+class SubmissionPipeline:
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self._lock = threading.Lock()
+        # незавершённые заявки: ключ → запись
+        self._records: dict[str, dict] = {}
+        # недавно завершённые ключи — для отсечения повторной доставки апдейта
+        self._done: deque[str] = deque(maxlen=1000)
+        self._tasks: set[asyncio.Task] = set()
+        self._bot: Bot | None = None
+        # заявки, поднятые из журнала на стадии notified (см. _persist_row)
+        self._recovered: set[str] = set()
+        self.completed = 0
+        self.notify_failed = 0
+        self._load_journal()
+
+    def _load_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # недописанная при падении строка
+                    print(f"[submissions] skip broken journal line: {line[:80]}")
+                    continue
+                # в журнале — снимки записи по стадиям, последний побеждает
+                if record["stage"] == "done":
+                    self._records.pop(record["key"], None)
+                    self._done.append(record["key"])
+                else:
+                    self._records[record["key"]] = record
+        self._recovered = {
+            key for key, record in self._records.items() if record["stage"] == "notified"
+        }
+
+    def _write_journal(self, record: dict):
+        with self._lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _compact_journal(self):
+        """Переписать журнал, оставив только незавершённые заявки."""
+        with self._lock:
+            records = list(self._records.values())
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+
+    async def _save(self, record: dict):
+        await asyncio.to_thread(self._write_journal, dict(record))
+
+    def _spawn(self, record: dict):
+        task = asyncio.create_task(self._process(record))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def submit(
+        self,
+        key: str,
+        chat_id: int,
+        text: str,
+        row: list,
+        fallback_message_id,
+    ) -> bool:
+        """
+        Принять заявку. Возвращает False, если заявка с этим ключом уже принята.
+        После возврата заявка в журнале и не потеряется.
+
+        row — строка листа без последней колонки (message_id);
+        fallback_message_id — что записать вместо неё, если уведомление
+        доставить нельзя (бот удалён из чата и т.п.).
+        """
+        if key in self._records or key in self._done:
+            return False
+        record = {
+            "key": key,
+            "stage": "new",
+            "chat_id": chat_id,
+            "text": text,
+            "row": row,
+            "fallback_message_id": fallback_message_id,
+            "message_id": None,
+        }
+        self._records[key] = record
+        await self._save(record)
+        self._spawn(record)
+        return True
+
+    async def _notify(self, record: dict):
+        try:
+            message = await notifier.send_message(
+                self._bot,
+                record["chat_id"],
+                record["text"],
+                reply_markup=get_distributor_keyboard(),
+            )
+            record["message_id"] = message.message_id
+        except (TelegramNetworkError, TelegramServerError):
+            raise
+        except TelegramAPIError as e:
+            # повтор не поможет — строку всё равно пишем, без сообщения дистрибьютору
+            self.notify_failed += 1
+            print(f"[submissions] {record['key']}: notification failed: {e}")
+            record["message_id"] = record["fallback_message_id"]
+        record["stage"] = "notified"
+        await self._save(record)
+
+    def _persist_row(self, record: dict):
+        message_id = record["message_id"]
+        # лист проверяем только для заявок из журнала, застрявших после отправки:
+        # строку могли успеть поставить в очередь и записать до падения. Для новых
+        # заявок message_id только что получен от Telegram и в листе его быть не может.
+        check_sheet = record["key"] in self._recovered
+        if not sheets.request_exists(message_id, check_sheet=check_sheet):
+            sheets.enqueue_append(record["row"] + [message_id])
+
+    async def _persist(self, record: dict):
+        await sheets_async.run(self._persist_row, record)
+        record["stage"] = "done"
+        await self._save(record)
+        self._records.pop(record["key"], None)
+        self._recovered.discard(record["key"])
+        self._done.append(record["key"])
+        self.completed += 1
+        if not self._records:
+            await asyncio.to_thread(self._compact_journal)
+
+    async def _process(self, record: dict):
+        attempt = 0
+        while record["stage"] != "done":
+            try:
+                if record["stage"] == "new":
+                    await self._notify(record)
+                else:
+                    await self._persist(record)
+                attempt = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** attempt)
+                attempt += 1
+                print(f"[submissions] {record['key']}: {record['stage']} failed, retry in {delay}s: {e}")
+                await asyncio.sleep(delay)
+
+    def start(self, bot: Bot):
+        """Запустить обработку; заявки из журнала прошлого запуска продолжаются."""
+        self._bot = bot
+        for record in list(self._records.values()):
+            self._spawn(record)
+
+    async def stop(self, timeout: float = 10):
+        """Дать текущим заявкам дойти; недоделанные останутся в журнале."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._records),
+            "completed": self.completed,
+            "notify_failed": self.notify_failed,
+        }
+
+
+_pipeline: SubmissionPipeline | None = None
+
+
+def get_pipeline() -> SubmissionPipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = SubmissionPipeline(SUBMISSIONS_JOURNAL)
+    return _pipeline
+
+
+async def submit(key: str, chat_id: int, text: str, row: list, fallback_message_id) -> bool:
+    return await get_pipeline().submit(key, chat_id, text, row, fallback_message_id)
+
+
+def submissions_stats() -> dict:
+    return get_pipeline().stats()
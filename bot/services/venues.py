@@ -0,0 +1,183 @@
+"""
+Индекс заведений амбассадоров (лист «Заведения» рабочей таблицы).
+
+Индекс строится один раз из листа и хранится в кэше: список заведений
+амбассадора и поиск конкретного заведения — это обращения к словарю,
+без скачивания листа на каждое сообщение или перелистывание страницы.
+
+Формат строки листа (см. build_venues_from_source):
+0 - username амбассадора (@nickname)
+1 - название заведения
+2 - адрес (опционально)
+3 - нормализованный ключ (опционально)
+"""
+import hashlib
+from dataclasses import dataclass
+
+from bot.config import VENUES_TTL
+from bot.services import sheets, sheets_async
+from bot.services.cache import SnapshotCache
+from bot.services.normalize import normalize_venue_name
+from bot.services.search import TrigramIndex
+from bot.utils import normalize_username
+
+VENUES_SHEET = "Заведения"
+
+
+@dataclass(frozen=True)
+class Venue:
+    id: int
+    ambassador: str
+    name: str
+    address: str
+    normalized_key: str
+
+
+@dataclass(frozen=True)
+class VenueIndex:
+    version: int
+    # нормализованный username → заведения (в порядке листа)
+    by_ambassador: dict[str, tuple[Venue, ...]]
+    # (нормализованный username, название) → заведение
+    by_name: dict[tuple[str, str], Venue]
+    # id заведения (в callback_data кнопок) → заведение
+    by_id: dict[int, Venue]
+    # нормализованный username → нечёткий поиск по ключам его заведений
+    search: dict[str, TrigramIndex]
+
+    def venues_for(self, ambassador_username: str) -> tuple[Venue, ...]:
+        return self.by_ambassador.get(normalize_username(ambassador_username), ())
+
+    def get_by_id(self, venue_id: int) -> Venue | None:
+        return self.by_id.get(venue_id)
+
+    def search_venues(
+        self, ambassador_username: str, query: str, limit: int = 50
+    ) -> list[tuple[Venue, float]]:
+        """
+        Заведения амбассадора, похожие на запрос, с похожестью (лучшие — первыми);
+        похожесть ≥ 1 — запрос входит в название целиком.
+        """
+        index = self.search.get(normalize_username(ambassador_username))
+        if index is None:
+            return []
+        return index.search_scored(query, limit=limit)
+
+def _venue_id(ambassador: str, name: str) -> int:
+    digest = hashlib.blake2b(f"{ambassador}\n{name}".encode(), digest_size=6).digest()
+    return int.from_bytes(digest, "big")
+
+
+def build_venue_index(
+    rows: list,
+    version: int,
+    base: VenueIndex | None = None,
+) -> VenueIndex:
+    """
+    Строит индекс по строкам листа (без заголовка).
+    С `base` — новый индекс из старого плюс добавленные строки, без перечитывания листа;
+    поисковые индексы при этом дополняются на месте.
+    id заведения — хэш (амбассадор, название): он не зависит от порядка строк
+    и одинаков после перезапуска, так что уже отправленные кнопки указывают
+    на то же заведение или не находят ничего.
+    """
+    grouped: dict[str, list[Venue]] = {}
+    by_name: dict[tuple[str, str], Venue] = {}
+    by_id: dict[int, Venue] = {}
+    search: dict[str, TrigramIndex] = {}
+    if base is not None:
+        grouped = {amb: list(v) for amb, v in base.by_ambassador.items()}
+        by_name = dict(base.by_name)
+        by_id = dict(base.by_id)
+        search = dict(base.search)
+
+    for row in rows:
+        if len(row) < 2:
+            continue
+        amb = normalize_username(row[0])
+        name = str(row[1]).strip()
+        # дубликаты названия у одного амбассадора показываем один раз
+        if not amb or not name or (amb, name) in by_name:
+            continue
+
+        venue_id = _venue_id(amb, name)
+        while venue_id in by_id:
+            # коллизия хэша — берём следующий свободный
+            venue_id += 1
+
+        venue = Venue(
+            id=venue_id,
+            ambassador=amb,
+            name=name,
+            address=str(row[2]).strip() if len(row) > 2 else "",
+            normalized_key=str(row[3]).strip() if len(row) > 3 else "",
+        )
+        by_name[(amb, name)] = venue
+        by_id[venue_id] = venue
+        grouped.setdefault(amb, []).append(venue)
+        search.setdefault(amb, TrigramIndex()).add(
+            venue, venue.normalized_key or normalize_venue_name(venue.name, venue.address)
+        )
+
+    return VenueIndex(
+        version=version,
+        by_ambassador={amb: tuple(v) for amb, v in grouped.items()},
+        by_name=by_name,
+        by_id=by_id,
+        search=search,
+    )
+
+
+async def _load_index() -> VenueIndex:
+    rows = await sheets_async.read_sheet(VENUES_SHEET)
+    current = _cache.peek()
+    # пропускаем заголовок
+    return build_venue_index(rows[1:], current.version + 1 if current else 1)
+
+
+_cache = SnapshotCache("venues", _load_index, VENUES_TTL)
+
+
+async def get_venue_index() -> VenueIndex:
+    return await _cache.get()
+
+
+async def get_venues(ambassador_username: str) -> tuple[Venue, ...]:
+    """Заведения, закреплённые за амбассадором (с id для кнопок)."""
+    return (await get_venue_index()).venues_for(ambassador_username)
+
+
+async def search_venues(ambassador_username: str, query: str) -> list[tuple[Venue, float]]:
+    return (await get_venue_index()).search_venues(ambassador_username, query)
+
+
+async def get_venue_by_id(venue_id: int) -> Venue | None:
+    return (await get_venue_index()).get_by_id(venue_id)
+
+
+async def refresh_venues() -> VenueIndex:
+    return await _cache.refresh()
+
+
+def invalidate_venues():
+    _cache.invalidate()
+
+
+async def sync_new_venues() -> int:
+    """
+    Дописать в лист «Заведения» только новые ответы формы и добавить их
+    в индекс без перечитывания листа.
+    """
+    new_rows = await sheets_async.run(sheets.sync_new_venues)
+    current = _cache.peek()
+    if new_rows and current is not None:
+        _cache.prime(build_venue_index(new_rows, current.version + 1, base=current))
+    return len(new_rows)
+
+
+async def sync_venues_from_source() -> int:
+    """Пересобрать лист «Заведения» из живой таблицы и сразу обновить индекс."""
+    with sheets.background_priority():
+        count = await sheets_async.run(sheets.build_venues_from_source)
+    await refresh_venues()
+    return count
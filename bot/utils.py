@@ -0,0 +1,46 @@
+def normalize_username(username: str | None) -> str:
+    """Username в едином виде для ключей и сравнений: '@nickname' в нижнем регистре."""
+    if not username:
+        return ""
+    username = str(username).strip().lstrip("@").lower()
+    return f"@{username}" if username else ""
+
+
+# Ограничение Telegram на длину одного сообщения
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class MessageChunker:
+    """
+    Собирает строки отчёта в сообщения не длиннее `limit` символов.
+    Строки копятся в списке и склеиваются один раз на сообщение, без
+    квадратичного `text += ...`.
+    """
+
+    def __init__(self, header: str = "", limit: int = TELEGRAM_MESSAGE_LIMIT):
+        self.limit = limit
+        self._parts: list[str] = [header] if header else []
+        self._size = len(header)
+
+    def add(self, line: str) -> list[str]:
+        """Добавить строку; вернуть сообщения, которые уже заполнены."""
+        ready = []
+        line += "\n"
+        # слишком длинную строку режем на куски
+        while len(line) > self.limit:
+            ready.extend(self.add(line[:self.limit - 1]))
+            line = line[self.limit - 1:]
+        if self._size + len(line) > self.limit and self._parts:
+            ready.append("".join(self._parts))
+            self._parts, self._size = [], 0
+        self._parts.append(line)
+        self._size += len(line)
+        return ready
+
+    def finish(self) -> str | None:
+        """Последнее недозаполненное сообщение, если есть."""
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts, self._size = [], 0
+        return text
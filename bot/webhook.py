@@ -0,0 +1,148 @@
+"""
+Webhook-режим: aiohttp-сервер принимает апдейты Telegram вместо long polling.
+
+Запрос сразу кладётся в ограниченную очередь и получает ответ 200, а
+апдейты обрабатывают WEBHOOK_WORKERS воркеров. Если очередь полна,
+сервер отвечает 503 и Telegram повторит доставку позже. При остановке
+сервер перестаёт принимать апдейты и дожидается обработки уже принятых.
+
+Рассчитан на ОДИН экземпляр бота. Несколько экземпляров за балансировщиком
+не поддерживаются: черновики заявок (FSM) лежат в локальном SQLite с кэшем
+в памяти процесса, а очередь записи, индекс строк «Заявок», зеркало заявок
+и отметка синхронизации заведений у каждого процесса свои. Если всё же
+нужен второй процесс на ту же таблицу (резервный, отладочный), выключите
+в нём RUN_SHEET_SYNC_JOBS, чтобы новые заведения не дописывались дважды.
+
+Эндпоинты:
+  POST WEBHOOK_PATH — апдейты (заголовок X-Telegram-Bot-Api-Secret-Token,
+                      если задан WEBHOOK_SECRET)
+  GET  /health      — состояние: размер очереди, сколько обработано
+
+Локальная проверка записанным апдейтом:
+  curl -X POST -H 'Content-Type: application/json' \
+       --data @update.json http://localhost:8080/telegram/webhook
+"""
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+from bot.config import (
+    WEBAPP_HOST,
+    WEBAPP_PORT,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_SECRET,
+    WEBHOOK_WORKERS,
+)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class UpdateQueue:
+    """Ограниченная очередь апдейтов и пул воркеров, передающих их в диспетчер."""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, size: int, workers: int):
+        self.dp = dp
+        self.bot = bot
+        self.queue: asyncio.Queue[Update] = asyncio.Queue(maxsize=size)
+        self.workers = workers
+        self.accepting = False
+        self.processed = 0
+        self.failed = 0
+        self._tasks: list[asyncio.Task] = []
+
+    def put(self, update: Update) -> bool:
+        if not self.accepting:
+            return False
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dp.feed_update(self.bot, update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[webhook] ERROR processing update {update.update_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        self.accepting = True
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def drain(self):
+        """Перестать принимать апдейты и дождаться обработки принятых."""
+        self.accepting = False
+        await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def handle_update(request: web.Request) -> web.Response:
+    updates: UpdateQueue = request.app["updates"]
+
+    if WEBHOOK_SECRET and request.headers.get(SECRET_HEADER) != WEBHOOK_SECRET:
+        return web.Response(status=401)
+
+    try:
+        data = await request.json()
+        update = Update.model_validate(data, context={"bot": updates.bot})
+    except Exception:
+        return web.Response(status=400)
+
+    if not updates.put(update):
+        return web.Response(status=503)
+    return web.Response()
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    updates: UpdateQueue = request.app["updates"]
+    return web.json_response({
+        "status": "ok" if updates.accepting else "stopping",
+        "queue": updates.queue.qsize(),
+        "processed": updates.processed,
+        "failed": updates.failed,
+    })
+
+
+def create_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    app = web.Application()
+    app["updates"] = UpdateQueue(dp, bot, WEBHOOK_QUEUE_SIZE, WEBHOOK_WORKERS)
+    app.router.add_post(WEBHOOK_PATH, handle_update)
+    app.router.add_get("/health", handle_health)
+
+    workflow_data = {"app": app, "dispatcher": dp, "bot": bot, "bots": [bot], **dp.workflow_data}
+
+    async def on_startup(app: web.Application):
+        await dp.emit_startup(**workflow_data)
+        app["updates"].start()
+        if WEBHOOK_BASE_URL:
+            await bot.set_webhook(
+                WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET or None,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+
+    async def on_shutdown(app: web.Application):
+        await app["updates"].drain()
+        await dp.emit_shutdown(**workflow_data)
+        await bot.session.close()
+
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    return app
+
+
+def run_webhook(dp: Dispatcher, bot: Bot):
+    print(f"Бот запущен (webhook) на {WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH}...")
+    web.run_app(create_app(dp, bot), host=WEBAPP_HOST, port=WEBAPP_PORT, print=None)